@@ -12,6 +12,7 @@ from torch.utils.data import Dataset
 import MinkowskiEngine as ME
 
 import numpy as np
+from numpy.lib import recfunctions as rfn
 import os
 import json
 
@@ -48,8 +49,8 @@ class InterMultiObj3DSegDataset(Dataset):
 
         point_cloud = read_ply(os.path.join(self.scan_folder, scene_name + '.ply'))
         
-        coords_full = np.column_stack([point_cloud['x'], point_cloud['y'], point_cloud['z']]).astype(np.float64)
-        colors_full = np.column_stack([point_cloud['R'], point_cloud['G'], point_cloud['B']])/255
+        coords_full = rfn.structured_to_unstructured(point_cloud[['x', 'y', 'z']], dtype=np.float64)
+        colors_full = rfn.structured_to_unstructured(point_cloud[['R', 'G', 'B']], dtype=np.float64) / 255
         labels_full = point_cloud['label'].astype(np.int32)
 
         if self.transforms:
@@ -24,6 +24,7 @@
 
 # Basic libs
 import numpy as np
+from numpy.lib import recfunctions as rfn
 import sys
 
 
@@ -174,8 +175,10 @@ def read_ply(filename, triangular_mesh=False):
                                ('v3', ext + 'i4')]
             faces_data = np.fromfile(plyfile, dtype=face_properties, count=num_faces)
 
-            # Return vertex data and concatenated faces
-            faces = np.vstack((faces_data['v1'], faces_data['v2'], faces_data['v3'])).T
+            # Return vertex data and concatenated faces; one strided copy
+            # straight into a contiguous (N, 3) array instead of three
+            # concatenations plus a transposed view
+            faces = rfn.structured_to_unstructured(faces_data[['v1', 'v2', 'v3']])
             data = [vertex_data, faces]
 
         else:
@@ -1,29 +1,50 @@
+import asyncio
+import base64
+import concurrent.futures
+import multiprocessing
 import os
-import shutil
 import tempfile
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
 from typing import Dict, List, Any
+from uuid import uuid4
 
+# Configure the CUDA caching allocator before torch is imported so repeated
+# inference on variably-sized point clouds fragments GPU memory less
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:512")
+
+import aiofiles
 import numpy as np
+import orjson
 import open3d as o3d
 import torch
 from fastapi import FastAPI, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 import app_utils  # Import our custom utility functions
 from app_utils import get_obj_color
 # Import the inference module
-from inference import Click, ClickHandler, PointCloudInference
+from inference import ClickHandler, PointCloudInference
 from logger import logger, StepTimer, timed
 from visual_obj_recognition import mask_obj_recognition
 
+# This process only serves inference: disable autograd globally and let
+# cuDNN autotune kernels for the stable post-voxelization shapes
+torch.set_grad_enabled(False)
+torch.backends.cudnn.benchmark = True
+# Allow TF32 for float32 matmuls (transformer decoder linears); the mask
+# logits are argmax'd, so the reduced mantissa does not change predictions
+torch.set_float32_matmul_precision('high')
+
 # Create static directory if it doesn't exist
 static_dir = os.path.join(os.getcwd(), "static")
 os.makedirs(static_dir, exist_ok=True)
 
-app = FastAPI(title="AGILE3D Interactive Segmentation API")
+app = FastAPI(title="AGILE3D Interactive Segmentation API", default_response_class=ORJSONResponse)
 
 # Mount the static files directory
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
@@ -38,28 +59,139 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global state (in a real application, you might want to use a database)
-current_point_cloud = None
-current_point_cloud_path = None
-current_inference: PointCloudInference | None = None
-current_results = None
-current_object_info = None  # Store object recognition results
+
+class SessionState:
+    """All mutable state belonging to one upload session."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.point_cloud = None
+        self.point_cloud_path = None
+        self.inference: PointCloudInference | None = None
+        self.results = None
+        self.object_info = None  # Store object recognition results
+        # Mask last sent to the client, so follow-up clicks can be answered
+        # with a compact diff instead of re-sending the full mask
+        self.last_sent_mask: np.ndarray | None = None
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+# Sessions keyed by the token returned from /api/upload, most recently used
+# last. Clients that predate session tokens fall back to the latest session.
+MAX_SESSIONS = 4
+SESSION_IDLE_TTL = 30 * 60  # seconds before an untouched session is evicted
+sessions: 'OrderedDict[str, SessionState]' = OrderedDict()
+
+
+def get_session(session_id: str | None = None) -> SessionState | None:
+    """Look up a session by ID, falling back to the most recently used one."""
+    if session_id:
+        session = sessions.get(session_id)
+    else:
+        session = next(reversed(sessions.values())) if sessions else None
+
+    if session is not None:
+        session.last_used = time.monotonic()
+        sessions.move_to_end(session.session_id)
+    return session
+
+
+def _evict_stale_sessions() -> None:
+    """Drop least-recently-used and long-idle sessions, releasing their GPU tensors."""
+    now = time.monotonic()
+    evicted = []
+    while len(sessions) > MAX_SESSIONS:
+        evicted.append(sessions.popitem(last=False))
+    for session_id in [sid for sid, s in sessions.items() if now - s.last_used > SESSION_IDLE_TTL]:
+        evicted.append((session_id, sessions.pop(session_id)))
+    for session_id, session in evicted:
+        session.inference = None
+        logger.info(f"Evicted session {session_id}")
+    if evicted and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+# Lock guarding lazy model initialization so concurrent uploads don't both
+# load the checkpoint; the weights are shared by every session
+_model_init_lock = asyncio.Lock()
+_shared_model = None
+
+
+async def create_inference() -> PointCloudInference:
+    """
+    Create a PointCloudInference for a new session.
+
+    The underlying model is built and its checkpoint loaded only once; each
+    session gets its own lightweight wrapper holding per-scene state.
+    """
+    global _shared_model
+
+    if _shared_model is None:
+        async with _model_init_lock:
+            if _shared_model is None:
+                # Checkpoint deserialization and CUDA init block for seconds;
+                # run them off the event loop
+                inference = await asyncio.to_thread(
+                    PointCloudInference,
+                    pretraining_weights='agile3d/weights/checkpoint1099.pth',
+                    voxel_size=0.05
+                )
+                _shared_model = inference.model
+                return inference
+
+    return PointCloudInference(
+        pretraining_weights='agile3d/weights/checkpoint1099.pth',
+        voxel_size=0.05,
+        model=_shared_model
+    )
+
+
+@app.on_event("startup")
+async def preload_model():
+    """Warm the shared model so the first upload doesn't pay for checkpoint loading."""
+    if os.environ.get("SKIP_MODEL_PRELOAD"):
+        return
+    try:
+        await create_inference()
+        logger.info("Model preloaded at startup")
+    except Exception as e:
+        logger.warning(f"Model preload failed, deferring to first upload: {e}")
+
+
+@app.on_event("startup")
+async def log_cuda_allocator_config():
+    """Log CUDA allocator state at startup when memory debugging is enabled."""
+    if torch.cuda.is_available() and os.environ.get("DEBUG_CUDA_MEMORY"):
+        torch.cuda.empty_cache()
+        logger.info(f"CUDA allocator config: {os.environ.get('PYTORCH_CUDA_ALLOC_CONF')}")
+        logger.info(f"CUDA memory stats: {torch.cuda.memory_stats()}")
 
 
 class InferenceRequest(BaseModel):
     clickData: Dict[str, Dict[str, Any]]  # clickIdx, clickTimeIdx, clickPositions
     cubeSize: float
     objectNames: List[str]
+    # Force a full mask in the response (e.g. after a client reload) instead of
+    # a diff against the previously sent mask
+    fullMask: bool = False
+    sessionId: str | None = None
 
 
 class MaskObjDetectionRequest(BaseModel):
     # "mask" is a list of integers where 0 is background, 1 is first object, 2 is second object, etc.
-    mask: list
+    mask: list | None = None
+    # Compact alternative to "mask": the same values as a base64-encoded typed
+    # buffer, which skips boxing millions of Python ints during JSON parsing
+    mask_b64: str | None = None
+    dtype: str = 'uint8'
+    sessionId: str | None = None
 
 
 # New class for updating object information
 class UpdateObjectsRequest(BaseModel):
     objects: List[Dict[str, Any]]
+    sessionId: str | None = None
 
 
 # New endpoint to update object information
@@ -70,14 +202,19 @@ async def update_objects(request: UpdateObjectsRequest):
 
     The request body should contain a list of objects with id, name, and description fields.
     """
-    global current_object_info
+    session = get_session(request.sessionId)
+    if session is None:
+        return JSONResponse(
+            status_code=400,
+            content={"message": "No active session. Please upload a point cloud first."}
+        )
 
-    if not current_object_info:
-        current_object_info = []
+    if not session.object_info:
+        session.object_info = []
 
     # Create a mapping of existing object information by ID
     obj_info_map = {}
-    for obj in current_object_info:
+    for obj in session.object_info:
         if 'obj_id' in obj:
             obj_info_map[obj['obj_id']] = obj
 
@@ -108,8 +245,8 @@ async def update_objects(request: UpdateObjectsRequest):
             }
             updated_objects.append(new_obj)
 
-    # Replace the current object info with our updated version
-    current_object_info = updated_objects
+    # Replace the session's object info with our updated version
+    session.object_info = updated_objects
 
     logger.info(f"Updated information for {len(updated_objects)} objects")
 
@@ -123,71 +260,111 @@ async def update_objects(request: UpdateObjectsRequest):
 @timed
 async def upload_point_cloud(file: UploadFile = File(...)):
     """
-    Upload a point cloud file (PLY format)
+    Upload a point cloud file (PLY format). Returns a session token that
+    subsequent requests should pass to address this upload.
     """
-    global current_point_cloud, current_point_cloud_path, current_inference
+    session = SessionState(uuid4().hex)
 
     # Create a temporary directory to store the uploaded file
     temp_dir = tempfile.mkdtemp()
     logger.info(f"Created temporary directory for upload: {temp_dir}")
 
     try:
-        # Save the uploaded file
+        # Save the uploaded file with large async chunks so the event loop
+        # stays responsive during multi-hundred-MB uploads
         file_path = os.path.join(temp_dir, file.filename)
-        with open(file_path, 'wb') as f:
-            shutil.copyfileobj(file.file, f)
+        chunk_size = 4 * 1024 * 1024  # 4MB chunks
+        try:
+            async with aiofiles.open(file_path, 'wb') as f:
+                while chunk := await file.read(chunk_size):
+                    await f.write(chunk)
+        finally:
+            # Release the upload's spooled temporary file right away rather
+            # than holding it until the request is torn down
+            await file.close()
 
         logger.info(f"Saved uploaded file to: {file_path}")
 
         # Store the file path for later use
-        current_point_cloud_path = file_path
+        session.point_cloud_path = file_path
 
-        # Load the point cloud
+        # Load the point cloud (Open3D parsing is blocking, so run it off the
+        # event loop to keep other requests responsive)
         async with StepTimer("Loading point cloud geometry"):
-            pcd_type = o3d.io.read_file_geometry_type(file_path)
-
-            if pcd_type == o3d.io.FileGeometry.CONTAINS_TRIANGLES:
+            # A header-only sniff replaces Open3D's geometry-type probe, which
+            # opens and parses the file a second time before the real read
+            kind = await asyncio.to_thread(app_utils.sniff_ply_kind, file_path)
+            if kind is None:
+                pcd_type = await asyncio.to_thread(o3d.io.read_file_geometry_type, file_path)
+                if pcd_type == o3d.io.FileGeometry.CONTAINS_TRIANGLES:
+                    kind = "mesh"
+                elif pcd_type == o3d.io.FileGeometry.CONTAINS_POINTS:
+                    kind = "pointcloud"
+
+            if kind == "mesh":
                 # It's a mesh
-                mesh = o3d.io.read_triangle_mesh(file_path)
-                coords = np.array(mesh.vertices)
-                colors = np.array(mesh.vertex_colors) if mesh.has_vertex_colors() else np.ones(
-                    (len(mesh.vertices), 3)) * 0.5
+                geometry = await asyncio.to_thread(o3d.io.read_triangle_mesh, file_path)
+                coords = np.asarray(geometry.vertices)
+                colors = np.asarray(geometry.vertex_colors) if geometry.has_vertex_colors() else np.ones(
+                    (len(geometry.vertices), 3)) * 0.5
+                # Keep the connectivity so the export doesn't re-parse the
+                # file just to recover it
+                triangles = np.array(geometry.triangles)
                 is_point_cloud = False
-                logger.info(f"Loaded mesh with {len(mesh.vertices)} vertices")
-            elif pcd_type == o3d.io.FileGeometry.CONTAINS_POINTS:
+                logger.info(f"Loaded mesh with {len(geometry.vertices)} vertices")
+            elif kind == "pointcloud":
                 # It's a point cloud
-                pcd = o3d.io.read_point_cloud(file_path)
-                coords = np.array(pcd.points)
-                colors = np.array(pcd.colors) if pcd.has_colors() else np.ones((len(pcd.points), 3)) * 0.5
+                geometry = await asyncio.to_thread(o3d.io.read_point_cloud, file_path)
+                coords = np.asarray(geometry.points)
+                colors = np.asarray(geometry.colors) if geometry.has_colors() else np.ones(
+                    (len(geometry.points), 3)) * 0.5
+                triangles = None
                 is_point_cloud = True
-                logger.info(f"Loaded point cloud with {len(pcd.points)} points")
+                logger.info(f"Loaded point cloud with {len(geometry.points)} points")
             else:
                 return JSONResponse(
                     status_code=400,
                     content={"message": f"Unsupported file format: {file.filename}"}
                 )
 
-        # Initialize the inference object
+            # Cache compact float32 copies and let the Open3D geometry go out
+            # of scope: 12 bytes per coordinate kept per session instead of 24
+            # plus the parsed geometry object
+            coords = np.ascontiguousarray(coords, dtype=np.float32)
+            colors = np.ascontiguousarray(colors, dtype=np.float32)
+            del geometry
+
+        # Initialize the inference object (model weights are cached across uploads)
         async with StepTimer("Initializing inference model"):
-            current_inference = PointCloudInference(
-                pretraining_weights='agile3d/weights/checkpoint1099.pth',
-                voxel_size=0.05
+            session.inference = await create_inference()
+            # Hand over the arrays parsed above instead of re-reading the file
+            await asyncio.to_thread(
+                session.inference.load_point_cloud_from_arrays,
+                coords, colors,
+                "pointcloud" if is_point_cloud else "mesh",
+                file_path
             )
-            current_inference.load_point_cloud(file_path)
 
-        # Store the full point cloud data (but don't return it to client)
-        current_point_cloud = {
+        # Store the full point cloud data (but don't return it to client).
+        # The cached arrays save a re-parse of the file in /api/download-results.
+        session.point_cloud = {
             "is_point_cloud": is_point_cloud,
             "coords": coords,
             "colors": colors,
+            "triangles": triangles,
             "point_count": len(coords)
         }
 
+        # Register the session and retire the oldest ones
+        sessions[session.session_id] = session
+        _evict_stale_sessions()
+
         # Return only metadata - no point cloud data
         logger.info(f"Successfully processed upload: {file.filename}")
         return JSONResponse(content={
             "message": "File uploaded successfully",
             "filename": file.filename,
+            "sessionId": session.session_id,
             "pointCount": len(coords),
             "boundingBox": {
                 "min": coords.min(axis=0).tolist(),
@@ -204,83 +381,150 @@ async def upload_point_cloud(file: UploadFile = File(...)):
         )
 
 
+def _run_inference_sync(inference: PointCloudInference) -> np.ndarray:
+    """Run model inference with autograd tracking fully disabled."""
+    with torch.inference_mode():
+        return inference.run_inference()
+
+
 @app.post("/api/infer")
 @timed
 async def run_inference(request: InferenceRequest):
     """
-    Run inference on the current point cloud with the provided click data
+    Run inference on the session's point cloud with the provided click data
     """
-    global current_inference, current_results
+    session = get_session(request.sessionId)
 
-    if not current_inference:
+    if session is None or session.inference is None:
         return JSONResponse(
             status_code=400,
             content={"message": "No point cloud loaded. Please upload a point cloud first."}
         )
 
     try:
-        async with StepTimer("Converting click data"):
-            # Convert click data to format expected by inference
-            click_handler = ClickHandler()
-
-            # Process click positions and create Click objects
-            for obj_idx_str, positions in request.clickData["clickPositions"].items():
-                obj_idx = int(obj_idx_str)
-                obj_name = "background" if obj_idx == 0 else f"object_{obj_idx}"
-
-                # Get time indices for this object
-                time_indices = request.clickData["clickTimeIdx"][obj_idx_str]
-
-                for i, pos in enumerate(positions):
-                    # Create click and add to handler
-                    click = Click(
-                        position=torch.tensor(pos, dtype=torch.float32),
-                        obj_idx=obj_idx,
-                        obj_name=obj_name,
-                        time_idx=time_indices[i],
-                        is_positive=True,
-                        cube_size=request.cubeSize
+        async with session.lock:
+            async with StepTimer("Converting click data"):
+                # Flatten all click data so the nearest-point search runs once, batched
+                positions = []
+                obj_indices = []
+                obj_names = []
+                time_indices = []
+                for obj_idx_str, obj_positions in request.clickData["clickPositions"].items():
+                    obj_idx = int(obj_idx_str)
+                    obj_name = "background" if obj_idx == 0 else f"object_{obj_idx}"
+
+                    positions.extend(obj_positions)
+                    obj_indices.extend([obj_idx] * len(obj_positions))
+                    obj_names.extend([obj_name] * len(obj_positions))
+                    time_indices.extend(request.clickData["clickTimeIdx"][obj_idx_str])
+
+                # The frontend resends the full click history every request. When
+                # the incoming set is the previous one plus new clicks, feed only
+                # the new ones to the session's existing handler so its resolved
+                # ids and cube-mask buffer carry over; anything else (undo,
+                # changed cube size, new scene) falls back to a full rebuild.
+                click_handler = session.inference.click_handler
+                prev_clicks = click_handler.clicks if click_handler is not None else []
+                new_pos = [i for i, t in enumerate(time_indices) if t >= click_handler.next_time_idx] \
+                    if prev_clicks else []
+                # Undo frees a time index that the next click then reuses, so a
+                # matching index alone does not prove a click is unchanged;
+                # compare the full identity (object and position) of every
+                # claimed-known click and rebuild on any mismatch.
+                known_clicks = {
+                    click.time_idx: (click.obj_idx, tuple(click.position.tolist()))
+                    for click in prev_clicks
+                }
+                incremental = (
+                    bool(prev_clicks)
+                    and request.cubeSize == prev_clicks[0].cube_size
+                    and len(time_indices) == len(prev_clicks) + len(new_pos)
+                    and all(
+                        t >= click_handler.next_time_idx
+                        or known_clicks.get(t) == (
+                            obj_indices[i],
+                            tuple(np.asarray(positions[i], dtype=np.float32).tolist()),
+                        )
+                        for i, t in enumerate(time_indices)
                     )
-                    click_handler.clicks.append(click)
-
-                    # Find nearest point in the point cloud
-                    click.find_nearest_point(current_inference.raw_coords_qv)
-
-                    # Update model-compatible formats
-                    click_handler._update_click_dicts(click)
-
-        async with StepTimer("Setting up inference"):
-            # Set clicks in the inference object
-            current_inference.click_handler = click_handler
+                )
 
-        async with StepTimer("Running neural network inference"):
-            # Run inference
-            mask = current_inference.run_inference()
+                if incremental:
+                    if new_pos:
+                        click_handler.add_clicks_batch(
+                            [positions[i] for i in new_pos],
+                            [obj_indices[i] for i in new_pos],
+                            [obj_names[i] for i in new_pos],
+                            [time_indices[i] for i in new_pos],
+                            session.inference.raw_coords_qv_nn,
+                            cube_size=request.cubeSize,
+                            kdtree=session.inference.kdtree
+                        )
+                else:
+                    click_handler = ClickHandler()
+                    click_handler.add_clicks_batch(
+                        positions, obj_indices, obj_names, time_indices,
+                        session.inference.raw_coords_qv_nn,
+                        cube_size=request.cubeSize,
+                        kdtree=session.inference.kdtree
+                    )
 
-        async with StepTimer("Saving results"):
-            # Save the results
-            colored_ply = current_inference.save_results(
-                mask,
-                output_dir="./outputs",
-                prefix=f"web_session_{os.path.basename(os.path.splitext(current_point_cloud_path)[0])}"
-            )
+            async with StepTimer("Setting up inference"):
+                # Set clicks in the inference object
+                session.inference.click_handler = click_handler
+
+            async with StepTimer("Running neural network inference"):
+                # Run inference off the event loop; it's CPU/GPU-bound
+                mask = await asyncio.to_thread(_run_inference_sync, session.inference)
+
+            async with StepTimer("Saving results"):
+                # Save the results
+                colored_ply = await asyncio.to_thread(
+                    session.inference.save_results,
+                    mask,
+                    output_dir="./outputs",
+                    prefix=f"web_session_{os.path.basename(os.path.splitext(session.point_cloud_path)[0])}"
+                )
 
-            # Store the results for later download
-            current_results = {
-                "mask": mask,
-                "result_path": colored_ply
-            }
+                # Store the results for later download
+                session.results = {
+                    "mask": mask,
+                    "result_path": colored_ply
+                }
 
-            # Prepare segmentation results for frontend
-            segmentation = mask.tolist()
+                # Prepare segmentation results for frontend, downcast from int64
+                # to one byte per point first
+                logger.info(f'Number of positive points in mask: {int(np.count_nonzero(mask))}')
 
-            logger.info(f'Number of positive points in mask: {segmentation.count(True)}')
+                segmentation = mask.astype(np.uint8)
 
-        return JSONResponse(content={
+                # Successive inferences usually change only a small region around
+                # the new click, so send just the changed indices when possible
+                send_full = (
+                        request.fullMask
+                        or session.last_sent_mask is None
+                        or session.last_sent_mask.shape != segmentation.shape
+                )
+                if send_full:
+                    # Base64 typed buffer: ~1.3 bytes per point on the wire
+                    # instead of a JSON number plus comma per point
+                    segmented_point_cloud = {
+                        "segmentationB64": base64.b64encode(segmentation.tobytes()).decode(),
+                        "length": int(segmentation.size)
+                    }
+                else:
+                    changed = np.nonzero(segmentation != session.last_sent_mask)[0].astype(np.uint32)
+                    segmented_point_cloud = {
+                        "diffIndices": base64.b64encode(changed.tobytes()).decode(),
+                        "diffValues": base64.b64encode(segmentation[changed].tobytes()).decode(),
+                        "length": int(segmentation.size)
+                    }
+                    logger.info(f"Returning mask diff with {changed.size} changed points")
+                session.last_sent_mask = segmentation
+
+        return ORJSONResponse(content={
             "message": "Inference completed successfully",
-            "segmentedPointCloud": {
-                "segmentation": segmentation
-            }
+            "segmentedPointCloud": segmented_point_cloud
         })
 
     except Exception as e:
@@ -294,9 +538,47 @@ async def run_inference(request: InferenceRequest):
 
 
 def mask_obj_recognition_worker(args):
-    obj_id, point_cloud_path, mask_np = args
-    # Use mask_np.copy() if necessary to avoid sharing issues.
-    return mask_obj_recognition(point_cloud_path, mask_np.copy(), obj_id)
+    obj_id, point_cloud_path, shm_name, n_points, start, end = args
+    # Attach the shared sorted-index array and rebuild just this object's
+    # points from its contiguous slice - no full-mask scan per worker.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        order = np.ndarray((n_points,), dtype=np.uint32, buffer=shm.buf)
+        obj_mask = np.zeros(n_points, dtype=np.uint16)
+        obj_mask[order[start:end]] = obj_id
+        return mask_obj_recognition(point_cloud_path, obj_mask, obj_id)
+    finally:
+        shm.close()
+
+
+def _init_recognition_worker():
+    """Pre-import heavy dependencies so each worker pays the cost once."""
+    import visual_obj_recognition  # noqa: F401
+
+
+# Persistent worker pool for mask object recognition, created lazily so
+# workers are forked once and reused instead of respawned per request
+_recognition_executor: concurrent.futures.ProcessPoolExecutor | None = None
+
+
+def get_recognition_executor() -> concurrent.futures.ProcessPoolExecutor:
+    global _recognition_executor
+
+    if _recognition_executor is None:
+        processor_num = min(8, multiprocessing.cpu_count())
+        logger.info(f"Starting persistent recognition pool with {processor_num} workers")
+        _recognition_executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processor_num,
+            initializer=_init_recognition_worker
+        )
+    return _recognition_executor
+
+
+@app.on_event("shutdown")
+async def shutdown_recognition_pool():
+    """Tear down the persistent recognition worker pool on server exit."""
+    if _recognition_executor is not None:
+        _recognition_executor.shutdown(wait=False, cancel_futures=True)
 
 
 @app.post("/api/mask_obj_recognition")
@@ -313,26 +595,37 @@ async def run_mask_obj_recognition(request: MaskObjDetectionRequest):
       - A list of JSON objects with keys "selected_views", "description", "label", and "cost",
         one for each unique object ID in the mask (excluding background).
     """
-    global current_point_cloud_path, current_object_info
-    if not current_point_cloud_path:
+    session = get_session(request.sessionId)
+    if session is None or not session.point_cloud_path:
         return JSONResponse(
             status_code=400,
             content={"message": "No point cloud loaded. Please upload a point cloud first."}
         )
     try:
-        mask = request.mask
-        if not isinstance(mask, list):
-            return JSONResponse(
-                status_code=400,
-                content={"message": "Invalid mask format. Please provide a list of integers."}
-            )
+        if request.mask_b64 is not None:
+            # Decode the typed buffer directly into numpy - a single memcpy
+            # instead of parsing one JSON number per point.
+            mask_np = np.frombuffer(base64.b64decode(request.mask_b64), dtype=np.dtype(request.dtype))
+        else:
+            mask = request.mask
+            if not isinstance(mask, list):
+                return JSONResponse(
+                    status_code=400,
+                    content={"message": "Invalid mask format. Please provide a list of integers."}
+                )
 
-        # Convert to numpy array.
-        mask_np = np.array(mask, dtype=int)
+            # Convert to numpy array, downcast to the smallest integer dtype that
+            # fits the object IDs so the mask uses 1-2 bytes per point, not 8.
+            # The max() runs on the typed array, not on boxed Python ints.
+            logger.warning("Received mask as a JSON list; clients should send mask_b64 instead")
+            mask_np = np.asarray(mask, dtype=np.uint16)
+            if mask_np.size and mask_np.max() < 256:
+                mask_np = mask_np.astype(np.uint8)
 
-        # Find unique object IDs, excluding background (0).
-        unique_obj_ids = np.unique(mask_np)
-        unique_obj_ids = unique_obj_ids[unique_obj_ids > 0]
+        # Find unique object IDs, excluding background (0). The mask dtype is
+        # small, so a linear bincount beats np.unique's O(N log N) sort.
+        counts = np.bincount(mask_np) if mask_np.size else np.zeros(1, dtype=np.int64)
+        unique_obj_ids = np.nonzero(counts[1:])[0] + 1
 
         if len(unique_obj_ids) == 0:
             return JSONResponse(
@@ -340,29 +633,49 @@ async def run_mask_obj_recognition(request: MaskObjDetectionRequest):
                 content={"message": "No objects found in the mask (all values are 0/background)."}
             )
 
+        # One stable argsort groups each object's point indices into a
+        # contiguous slice, so K workers no longer each rescan the full mask.
+        # Only the index array is published in shared memory.
+        order = np.argsort(mask_np, kind='stable').astype(np.uint32)
+        sorted_ids = mask_np[order]
+        starts = np.searchsorted(sorted_ids, unique_obj_ids, side='left')
+        ends = np.searchsorted(sorted_ids, unique_obj_ids, side='right')
+
+        shm = shared_memory.SharedMemory(create=True, size=order.nbytes)
+        shared_order = np.ndarray(order.shape, dtype=order.dtype, buffer=shm.buf)
+        shared_order[:] = order
+
         # Prepare arguments for each object.
         work_args = [
-            (obj_id, current_point_cloud_path, mask_np)
-            for obj_id in unique_obj_ids
+            (int(obj_id), session.point_cloud_path, shm.name, int(mask_np.size), int(start), int(end))
+            for obj_id, start, end in zip(unique_obj_ids, starts, ends)
         ]
 
-        # Process each object in parallel.
-        import multiprocessing
-
-        processor_num = min(8, min(multiprocessing.cpu_count(), len(work_args)))
-        logger.info(f"Using {processor_num} processors for mask object recognition")
-
-        with StepTimer("Mask Object Recognition"):
-            with multiprocessing.Pool(processes=processor_num) as pool:
-                result = pool.map(mask_obj_recognition_worker, work_args)
-
-        # Store the results for later use in download
-        current_object_info = result
+        # Process each object in parallel on the persistent worker pool.
+        executor = get_recognition_executor()
+        loop = asyncio.get_running_loop()
 
-        return JSONResponse(content={
-            "message": "Mask object recognition completed successfully",
-            "result": result
-        })
+        # Stream each object's result as soon as its worker finishes (NDJSON)
+        # instead of blocking until the slowest object completes
+        async def result_stream():
+            collected = []
+            try:
+                with StepTimer("Mask Object Recognition"):
+                    futures = [
+                        loop.run_in_executor(executor, mask_obj_recognition_worker, args)
+                        for args in work_args
+                    ]
+                    for future in asyncio.as_completed(futures):
+                        item = await future
+                        collected.append(item)
+                        yield orjson.dumps(item) + b"\n"
+            finally:
+                shm.close()
+                shm.unlink()
+                # Store the results for later use in download
+                session.object_info = collected
+
+        return StreamingResponse(result_stream(), media_type='application/x-ndjson')
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -374,57 +687,74 @@ async def run_mask_obj_recognition(request: MaskObjDetectionRequest):
 
 @app.get("/api/download-results")
 @timed
-async def download_results():
+async def download_results(sessionId: str | None = None, metadataFormat: str = "json"):
     """
     Download the segmentation results as a zip file containing:
     1. A PLY file with uncolored scene and colored objects
-    2. A JSON file with object labels, descriptions, colors, and other metadata
+    2. A metadata file with object labels, descriptions, colors, and other
+       metadata - JSON by default, MessagePack with metadataFormat=msgpack
     """
-    global current_results, current_object_info, current_inference, current_point_cloud_path, current_point_cloud
+    session = get_session(sessionId)
 
-    if not current_results or not current_results.get("result_path"):
+    if session is None or not session.results or not session.results.get("result_path"):
         return JSONResponse(
             status_code=400,
             content={"message": "No results available. Please run inference first."}
         )
 
     try:
-        # Create a temporary directory for the zip files
-        import tempfile
-        import json
+        # Create a temporary directory for the colored PLY file
         import shutil
+        import zipfile
         import os.path
 
+        from starlette.background import BackgroundTask
+
         temp_dir = tempfile.mkdtemp()
         logger.info(f"Created temporary directory: {temp_dir}")
 
         try:
             async with StepTimer("Preparing mask data"):
-                mask = current_results["mask"]
+                mask = session.results["mask"]
+                # Scan the mask once; the coloring and metadata steps below
+                # both reuse the histogram
+                mask_counts = np.bincount(mask.ravel())
+                present_ids = np.nonzero(mask_counts)[0]
 
             async with StepTimer("Loading point cloud data"):
                 # Get point cloud data - either from cached data or load from file
-                if current_point_cloud:
-                    coords = current_point_cloud["coords"]
-                    colors = current_point_cloud["colors"]
-                    is_point_cloud = current_point_cloud["is_point_cloud"]
+                if session.point_cloud:
+                    coords = session.point_cloud["coords"]
+                    colors = session.point_cloud["colors"]
+                    is_point_cloud = session.point_cloud["is_point_cloud"]
                     logger.info("Using cached point cloud data")
+                elif session.inference is not None and session.inference.coords is not None:
+                    # The inference object still holds the arrays it was
+                    # preprocessed from; reuse them before falling back to disk
+                    coords = session.inference.coords
+                    colors = session.inference.colors
+                    is_point_cloud = session.inference.point_type == "pointcloud"
+                    logger.info("Using point cloud data held by the inference object")
                 else:
                     # Load point cloud data from file
-                    logger.info(f"Loading point cloud data from: {current_point_cloud_path}")
-                    coords, colors, is_point_cloud = app_utils.load_point_cloud_data(current_point_cloud_path)
+                    logger.info(f"Loading point cloud data from: {session.point_cloud_path}")
+                    coords, colors, is_point_cloud = await asyncio.to_thread(
+                        app_utils.load_point_cloud_data, session.point_cloud_path)
 
             async with StepTimer("Creating colored PLY file"):
                 # Create a PLY file with uncolored scene and colored objects
                 new_ply_path = os.path.join(temp_dir, "scene_with_colored_objects.ply")
-                app_utils.create_colored_ply(
+                await asyncio.to_thread(
+                    app_utils.create_colored_ply,
                     coords=coords,
                     colors=colors,
                     mask=mask,
                     is_point_cloud=is_point_cloud,
-                    original_geometry_path=current_point_cloud_path,
+                    original_geometry_path=session.point_cloud_path,
                     output_path=new_ply_path,
-                    get_obj_color_func=get_obj_color
+                    get_obj_color_func=get_obj_color,
+                    unique_obj_ids=present_ids,
+                    triangles=session.point_cloud.get("triangles") if session.point_cloud else None
                 )
 
                 # Verify the PLY file was created
@@ -437,90 +767,77 @@ async def download_results():
                 metadata = app_utils.generate_metadata_json(
                     mask=mask,
                     new_ply_path=new_ply_path,
-                    original_file_path=current_point_cloud_path,
-                    object_info=current_object_info,
-                    inference_obj=current_inference,
-                    get_obj_color_func=get_obj_color
+                    original_file_path=session.point_cloud_path,
+                    object_info=session.object_info,
+                    inference_obj=session.inference,
+                    get_obj_color_func=get_obj_color,
+                    mask_counts=mask_counts
                 )
 
-                # Write the JSON file
-                json_path = os.path.join(temp_dir, "metadata.json")
-                with open(json_path, 'w') as f:
-                    json.dump(metadata, f, indent=2, cls=app_utils.NumpyEncoder, ensure_ascii=False)
-
-                # Verify the JSON file was created
-                if not os.path.exists(json_path):
-                    raise FileNotFoundError(f"Failed to create JSON file at {json_path}")
-                logger.info(f"Created JSON file: {json_path}, size: {os.path.getsize(json_path)} bytes")
-
-            async with StepTimer("Creating ZIP file"):
-                # Prepare for zip creation
-                zip_path = os.path.join(temp_dir, "segmentation_results.zip")
-                files_to_zip = {
-                    new_ply_path: os.path.basename(new_ply_path),
-                    json_path: "metadata.json"
-                }
+                # orjson handles the numpy scalars/arrays in the metadata
+                # natively, no NumpyEncoder pass needed
+                metadata_bytes, metadata_ext = app_utils.serialize_metadata(
+                    metadata, fmt=metadataFormat)
+
+            # Stream the archive as it is compressed: writing the zip through
+            # an unseekable sink makes zipfile emit data descriptors, so the
+            # first bytes reach the client while the PLY is still being read
+            logger.info("Streaming ZIP file to client")
+
+            class _ZipSink:
+                """Unseekable write target that hands finished chunks to the generator."""
+
+                def __init__(self):
+                    self.chunks = []
+
+                def write(self, data):
+                    self.chunks.append(bytes(data))
+                    return len(data)
+
+                def flush(self):
+                    pass
+
+                def drain(self):
+                    chunks, self.chunks = self.chunks, []
+                    return chunks
+
+            def iter_zip():
+                sink = _ZipSink()
+                bytes_sent = 0
+                chunk_size = 1024 * 1024  # 1MB chunks
+                with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+                    info = zipfile.ZipInfo.from_file(
+                        new_ply_path, arcname=os.path.basename(new_ply_path))
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    with zf.open(info, 'w') as dest, open(new_ply_path, 'rb') as src:
+                        while chunk := src.read(chunk_size):
+                            dest.write(chunk)
+                            for out in sink.drain():
+                                bytes_sent += len(out)
+                                yield out
+                    zf.writestr(f"metadata.{metadata_ext}", metadata_bytes)
+                for out in sink.drain():
+                    bytes_sent += len(out)
+                    yield out
+                logger.info(f"Finished streaming {bytes_sent} bytes")
 
-                # Create the zip file with explicit error handling
-                try:
-                    app_utils.create_zip_file(files_to_zip, zip_path)
-
-                    # Verify the zip file was created
-                    if not os.path.exists(zip_path):
-                        raise FileNotFoundError(f"Zip file was not created at {zip_path}")
-                    logger.info(f"Created ZIP file: {zip_path}, size: {os.path.getsize(zip_path)} bytes")
-                except Exception as zip_error:
-                    logger.error(f"Error creating zip file: {str(zip_error)}")
-                    raise
-
-            # Stream the zip file as response
-            logger.info("Preparing to stream ZIP file to client")
-
-            def iterfile():
-                with open(zip_path, 'rb') as f:
-                    chunk_size = 1024 * 1024  # 1MB chunks
-                    bytes_sent = 0
-                    while chunk := f.read(chunk_size):
-                        bytes_sent += len(chunk)
-                        yield chunk
-                    logger.info(f"Finished streaming {bytes_sent} bytes")
-
-            file_size = os.path.getsize(zip_path)
             headers = {
-                'Content-Disposition': f'attachment; filename="segmentation_results.zip"',
-                'Content-Type': 'application/zip',
-                'Content-Length': str(file_size)
+                'Content-Disposition': 'attachment; filename="segmentation_results.zip"',
+                'Content-Type': 'application/zip'
             }
 
             return StreamingResponse(
-                iterfile(),
+                iter_zip(),
                 headers=headers,
-                media_type='application/zip'
+                media_type='application/zip',
+                background=BackgroundTask(shutil.rmtree, temp_dir, ignore_errors=True)
             )
 
-        finally:
-            # Clean up the temporary directory, but don't delete it until the streaming is complete
-            # We'll rely on the StreamingResponse to complete before the function exits
-            try:
-                # Instead of immediately deleting, we'll schedule deletion after a delay
-                # to ensure streaming completes
-                import threading
-
-                def delayed_cleanup():
-                    import time
-                    # Wait a bit to ensure streaming completes
-                    time.sleep(10)
-                    if os.path.exists(temp_dir):
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                        logger.info(f"Cleaned up temporary directory: {temp_dir}")
-
-                # Start cleanup in a separate thread
-                cleanup_thread = threading.Thread(target=delayed_cleanup)
-                cleanup_thread.daemon = True
-                cleanup_thread.start()
-                logger.info(f"Scheduled delayed cleanup for directory: {temp_dir}")
-            except Exception as cleanup_error:
-                logger.warning(f"Error scheduling cleanup: {str(cleanup_error)}")
+        except Exception:
+            # Only clean up eagerly on failure; on success the BackgroundTask
+            # removes the directory after streaming completes
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
 
     except Exception as e:
         import traceback
@@ -538,4 +855,12 @@ if __name__ == "__main__":
 
     # Ensure output directory exists
     os.makedirs("./outputs", exist_ok=True)
-    uvicorn.run(app, host="0.0.0.0", port=9501)
+
+    # Sessions and the shared model live in process memory, so running more
+    # than one worker needs sticky routing in front; the default stays at a
+    # single process
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        uvicorn.run("app:app", host="0.0.0.0", port=9501, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=9501)
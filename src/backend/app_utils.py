@@ -1,14 +1,22 @@
+import functools
 import json
 import os
+import re
+import shutil
+import stat
 import zipfile
 
 import numpy as np
 import open3d as o3d
+import orjson
 
 from logger import get_logger
 
 logger = get_logger("app_utils")
 
+# Matches the numeric ID embedded in labels like "Object 3"
+_OBJ_ID_RE = re.compile(r'\d+')
+
 
 class NumpyEncoder(json.JSONEncoder):
     """Custom JSON encoder for numpy/torch types"""
@@ -25,7 +33,8 @@ class NumpyEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
-def create_colored_ply(coords, colors, mask, is_point_cloud, original_geometry_path, output_path, get_obj_color_func):
+def create_colored_ply(coords, colors, mask, is_point_cloud, original_geometry_path, output_path, get_obj_color_func,
+                       unique_obj_ids=None, triangles=None, compute_normals=False):
     """
     Creates a PLY file with uncolored scene (neutral gray) and colored objects
 
@@ -37,48 +46,143 @@ def create_colored_ply(coords, colors, mask, is_point_cloud, original_geometry_p
         original_geometry_path (str): Path to the original geometry file (for mesh triangles)
         output_path (str): Path to save the output PLY file
         get_obj_color_func (callable): Function to get object color based on ID
+        unique_obj_ids (np.ndarray, optional): Sorted unique IDs in the mask,
+            if the caller already computed them; saves a full mask scan
+        triangles (np.ndarray, optional): (F, 3) triangle indices for the mesh
+            path; saves re-parsing the original file just for connectivity
+        compute_normals (bool): Recompute vertex normals on the mesh path;
+            off by default since viewers typically compute their own
 
     Returns:
         str: Path to the saved PLY file
     """
-    # Create a new color array with background as neutral gray and objects colored
-    new_colors = np.ones((len(coords), 3)) * 0.7  # Default scene color (light gray)
-
-    # Apply object colors based on mask
-    unique_obj_ids = np.unique(mask)
+    # Color every point with a single palette lookup instead of one boolean
+    # scan over the mask per object
+    if unique_obj_ids is None:
+        unique_obj_ids = np.unique(mask)
     logger.info(f"Coloring {len(unique_obj_ids)} unique object IDs")
 
-    for obj_id in unique_obj_ids:
-        if obj_id > 0:  # Skip background
-            obj_mask = mask == obj_id
-            obj_color = get_obj_color_func(obj_id, normalize=True)
-            new_colors[obj_mask] = obj_color
-            logger.info(f"Applied color to object {obj_id}: {np.sum(obj_mask)} points")
+    # float32 halves the footprint of new_colors, the largest array here; the
+    # mesh branch casts to float64 once for Open3D, the point-cloud writer
+    # quantizes to uint8 anyway
+    fg_ids = unique_obj_ids[unique_obj_ids > 0]
+    if get_obj_color_func is get_obj_color:
+        # Fill all foreground rows with one vectorized call
+        fg_colors = get_obj_colors(fg_ids, normalize=True).astype(np.float32)
+    else:
+        fg_colors = np.array(
+            [get_obj_color_func(obj_id, normalize=True) for obj_id in fg_ids],
+            dtype=np.float32).reshape(-1, 3)
+
+    max_id = int(unique_obj_ids[-1]) if len(unique_obj_ids) else 0
+    if max_id + 1 <= 4 * len(unique_obj_ids) + 1024:
+        # Dense IDs: direct (max_id + 1, 3) palette gather
+        palette = np.full((max_id + 1, 3), 0.7, dtype=np.float32)  # Default scene color (light gray)
+        palette[fg_ids] = fg_colors
+        lut_ids = None
+    else:
+        # Sparse IDs: remap through searchsorted so the LUT stays O(K) rows
+        # instead of O(max_id)
+        palette = np.full((len(unique_obj_ids), 3), 0.7, dtype=np.float32)
+        palette[unique_obj_ids > 0] = fg_colors
+        lut_ids = unique_obj_ids
 
     # Create a new geometry with these colors
     if not is_point_cloud:
         # It's a mesh
         logger.info(f"Processing as mesh: {original_geometry_path}")
-        original_mesh = o3d.io.read_triangle_mesh(original_geometry_path)
+        new_colors = palette[mask if lut_ids is None else np.searchsorted(lut_ids, mask)]
+        # Vector3dVector only takes its fast bulk path for contiguous float64
+        # input; cast once here instead of letting Open3D convert per element
+        coords = np.ascontiguousarray(coords, dtype=np.float64)
+        new_colors = np.ascontiguousarray(new_colors, dtype=np.float64)
         new_geometry = o3d.geometry.TriangleMesh()
         new_geometry.vertices = o3d.utility.Vector3dVector(coords)
         new_geometry.vertex_colors = o3d.utility.Vector3dVector(new_colors)
-        new_geometry.triangles = original_mesh.triangles
-        new_geometry.compute_vertex_normals()
+        if triangles is not None:
+            new_geometry.triangles = o3d.utility.Vector3iVector(triangles)
+        else:
+            # Fall back to re-reading the source mesh for its connectivity
+            original_mesh = o3d.io.read_triangle_mesh(original_geometry_path)
+            new_geometry.triangles = original_mesh.triangles
+            if original_mesh.has_vertex_normals():
+                # Copying beats recomputing when the source already has them
+                new_geometry.vertex_normals = original_mesh.vertex_normals
+        if compute_normals and not new_geometry.has_vertex_normals():
+            new_geometry.compute_vertex_normals()
         o3d.io.write_triangle_mesh(output_path, new_geometry)
     else:
-        # It's a point cloud
+        # It's a point cloud - stream palette lookups straight into the binary
+        # writer tile by tile, so the full (N, 3) color array never exists
         logger.info(f"Processing as point cloud: {original_geometry_path}")
-        new_geometry = o3d.geometry.PointCloud()
-        new_geometry.points = o3d.utility.Vector3dVector(coords)
-        new_geometry.colors = o3d.utility.Vector3dVector(new_colors)
-        o3d.io.write_point_cloud(output_path, new_geometry)
+        palette_u8 = np.clip(palette * 255.0, 0, 255).astype(np.uint8)
+        write_ply_binary_palette(output_path, coords, mask, palette_u8, lut_ids)
 
     logger.info(f"Created colored geometry file: {output_path}")
     return output_path
 
 
-def generate_metadata_json(mask, new_ply_path, original_file_path, object_info, inference_obj, get_obj_color_func):
+def write_ply_binary_palette(output_path, coords, mask, palette_u8, lut_ids=None, tile_size=1 << 20):
+    """
+    Write a binary PLY where each point's color is a palette lookup of its
+    mask value, processed in fixed-size tiles so only one tile of colors and
+    packed vertices is ever resident instead of a full (N, 3) color array.
+
+    Args:
+        output_path (str): Path to save the PLY file
+        coords (np.ndarray): (N, 3) point coordinates
+        mask (np.ndarray): (N,) object IDs per point
+        palette_u8 (np.ndarray): (K, 3) uint8 color palette
+        lut_ids (np.ndarray, optional): Sorted IDs the palette rows correspond
+            to; when given, mask values are remapped via searchsorted (the
+            sparse-ID path), otherwise mask indexes the palette directly
+        tile_size (int): Points processed per tile
+
+    Returns:
+        str: Path to the saved PLY file
+    """
+    n = len(coords)
+    vertex_dtype = np.dtype([
+        ('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+        ('red', 'u1'), ('green', 'u1'), ('blue', 'u1')
+    ])
+    coords = np.asarray(coords, dtype='<f4')
+
+    header = (
+        f"ply\n"
+        f"format binary_little_endian 1.0\n"
+        f"element vertex {n}\n"
+        f"property float x\n"
+        f"property float y\n"
+        f"property float z\n"
+        f"property uchar red\n"
+        f"property uchar green\n"
+        f"property uchar blue\n"
+        f"end_header\n"
+    )
+    scratch = np.empty(min(tile_size, n), dtype=vertex_dtype)
+    with open(output_path, 'wb') as f:
+        f.write(header.encode('ascii'))
+        for start in range(0, n, tile_size):
+            end = min(start + tile_size, n)
+            tile = scratch[:end - start]
+            ids = mask[start:end]
+            if lut_ids is not None:
+                ids = np.searchsorted(lut_ids, ids)
+            tile_colors = palette_u8[ids]
+            tile['x'] = coords[start:end, 0]
+            tile['y'] = coords[start:end, 1]
+            tile['z'] = coords[start:end, 2]
+            tile['red'] = tile_colors[:, 0]
+            tile['green'] = tile_colors[:, 1]
+            tile['blue'] = tile_colors[:, 2]
+            tile.tofile(f)
+
+    return output_path
+
+
+def generate_metadata_json(mask, new_ply_path, original_file_path, object_info, inference_obj, get_obj_color_func,
+                           mask_counts=None):
     """
     Generate JSON metadata for segmentation results
 
@@ -89,12 +193,19 @@ def generate_metadata_json(mask, new_ply_path, original_file_path, object_info,
         object_info (list): List of object recognition results
         inference_obj: Inference object with click handler
         get_obj_color_func (callable): Function to get object color based on ID
+        mask_counts (np.ndarray, optional): Precomputed np.bincount of the
+            mask, if the caller already has it; saves a full mask scan
 
     Returns:
         dict: Metadata dictionary
     """
     logger.info("Generating metadata JSON")
 
+    # One linear bincount replaces the sort-based np.unique passes below
+    if mask_counts is None:
+        mask_counts = np.bincount(mask.ravel())
+    present_ids = np.nonzero(mask_counts)[0]
+
     metadata = {
         "objects": [],
         "file_info": {
@@ -114,8 +225,7 @@ def generate_metadata_json(mask, new_ply_path, original_file_path, object_info,
             else:
                 # Try to extract ID from label (e.g., "Object 1" -> 1)
                 label = obj_info.get('label', '')
-                import re
-                match = re.search(r'\d+', label)
+                match = _OBJ_ID_RE.search(label)
                 if match:
                     obj_id = int(match.group())
 
@@ -125,11 +235,8 @@ def generate_metadata_json(mask, new_ply_path, original_file_path, object_info,
 
             obj_color = get_obj_color_func(obj_id, normalize=True)
 
-            # Convert numpy values to Python native types for JSON serialization
-            if hasattr(obj_color, 'tolist'):
-                obj_color = obj_color.tolist()
-
-            # Create object data excluding selected_views
+            # Create object data excluding selected_views; numpy values are
+            # serialized natively by orjson downstream
             obj_data = {
                 "id": int(obj_id),
                 "label": obj_info.get("label", f"Object {obj_id}"),
@@ -146,12 +253,9 @@ def generate_metadata_json(mask, new_ply_path, original_file_path, object_info,
     else:
         # If no object info, include basic information based on the mask
         logger.info("No object info available, creating basic metadata from mask")
-        unique_obj_ids = np.unique(mask)
-        for obj_id in unique_obj_ids:
+        for obj_id in present_ids:
             if obj_id > 0:  # Skip background
                 obj_color = get_obj_color_func(obj_id, normalize=True)
-                if hasattr(obj_color, 'tolist'):
-                    obj_color = obj_color.tolist()
 
                 metadata["objects"].append({
                     "id": int(obj_id),
@@ -163,32 +267,15 @@ def generate_metadata_json(mask, new_ply_path, original_file_path, object_info,
     # Add click information if available
     if inference_obj and inference_obj.click_handler:
         logger.info("Adding click data to metadata")
-        click_data = []
-        for click in inference_obj.click_handler.clicks:
-            # Convert click to dict and ensure values are JSON serializable
-            click_dict = {}
-            raw_dict = click.to_dict()
-
-            for k, v in raw_dict.items():
-                # Convert any numpy/torch values to Python native types
-                if hasattr(v, 'tolist'):
-                    click_dict[k] = v.tolist()
-                elif hasattr(v, 'item'):
-                    click_dict[k] = v.item()
-                else:
-                    click_dict[k] = v
-
-            click_data.append(click_dict)
+        # Click.to_dict already yields native types, and orjson serializes any
+        # remaining numpy values directly - no per-field conversion pass
+        click_data = [click.to_dict() for click in inference_obj.click_handler.clicks]
 
         metadata["click_data"] = click_data
         logger.info(f"Added {len(click_data)} clicks to metadata")
 
     # Count points per object from the mask
-    unique_values, counts = np.unique(mask, return_counts=True)
-    object_counts = {}
-    for i, val in enumerate(unique_values):
-        if val > 0:  # Skip background
-            object_counts[int(val)] = int(counts[i])
+    object_counts = {int(i): int(mask_counts[i]) for i in present_ids if i > 0}
 
     metadata["object_counts"] = object_counts
     logger.info(f"Added point counts for {len(object_counts)} objects to metadata")
@@ -196,6 +283,35 @@ def generate_metadata_json(mask, new_ply_path, original_file_path, object_info,
     return metadata
 
 
+def serialize_metadata(metadata, fmt="json"):
+    """
+    Serialize export metadata to bytes.
+
+    Args:
+        metadata (dict): Metadata dictionary from generate_metadata_json
+        fmt (str): "json" (default, human-readable) or "msgpack" (compact
+                   binary for pipeline consumers that don't need text)
+
+    Returns:
+        tuple: (payload bytes, file extension without dot)
+    """
+    if fmt == "msgpack":
+        import msgpack  # imported lazily; only binary-metadata users need it
+
+        def _np_default(obj):
+            if isinstance(obj, np.ndarray):
+                return obj.tolist()
+            if hasattr(obj, 'item'):
+                return obj.item()
+            raise TypeError(f"Cannot serialize {type(obj)!r}")
+
+        return msgpack.packb(metadata, use_bin_type=True, default=_np_default), "msgpack"
+
+    return orjson.dumps(
+        metadata, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2
+    ), "json"
+
+
 def create_zip_file(files_to_zip, output_zip_path):
     """
     Create a zip file from the provided files
@@ -207,27 +323,33 @@ def create_zip_file(files_to_zip, output_zip_path):
     Returns:
         str: Path to the created zip file
     """
-    # Verify source files exist
+    # Verify source files exist - one stat syscall per file instead of the
+    # exists/isfile/getsize triple
     for file_path in files_to_zip.keys():
-        if not os.path.exists(file_path):
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
             logger.error(f"Source file not found: {file_path}")
             raise FileNotFoundError(f"Source file not found: {file_path}")
-        if not os.path.isfile(file_path):
+        if not stat.S_ISREG(st.st_mode):
             logger.error(f"Source path is not a file: {file_path}")
             raise ValueError(f"Source path is not a file: {file_path}")
+        logger.debug(f"File size: {st.st_size} bytes")
 
     # Ensure the parent directory exists
     os.makedirs(os.path.dirname(output_zip_path), exist_ok=True)
 
     logger.info(f"Creating zip file with {len(files_to_zip)} files at: {output_zip_path}")
 
-    # Create the zip file
-    with zipfile.ZipFile(output_zip_path, 'w') as zipf:
+    # Create the zip file, streaming each entry in 1MB blocks instead of
+    # zipf.write's small internal buffer
+    with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as zipf:
         for file_path, arc_name in files_to_zip.items():
             logger.debug(f"Adding to zip: {file_path} as {arc_name}")
-            file_size = os.path.getsize(file_path)
-            logger.debug(f"File size: {file_size} bytes")
-            zipf.write(file_path, arcname=arc_name)
+            info = zipfile.ZipInfo.from_file(file_path, arcname=arc_name)
+            with zipf.open(info, 'w', force_zip64=True) as dst, \
+                    open(file_path, 'rb', buffering=1 << 20) as src:
+                shutil.copyfileobj(src, dst, 1 << 20)
 
     # Verify the zip file was created
     if not os.path.exists(output_zip_path):
@@ -240,6 +362,42 @@ def create_zip_file(files_to_zip, output_zip_path):
     return output_zip_path
 
 
+def sniff_ply_kind(file_path):
+    """
+    Determine whether a PLY file holds a mesh or a point cloud by reading
+    only its header, instead of letting Open3D open and parse the file a
+    second time just to report the geometry type.
+
+    Args:
+        file_path (str): Path to the PLY file
+
+    Returns:
+        str or None: "mesh", "pointcloud", or None if the header could not
+                     be parsed (caller should fall back to a full probe)
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            header = b''
+            while b'end_header' not in header:
+                chunk = f.read(4096)
+                if not chunk:
+                    return None
+                header += chunk
+                if len(header) > 1 << 16:
+                    return None
+
+        if not header.startswith(b'ply'):
+            return None
+
+        for line in header.split(b'\n'):
+            parts = line.split()
+            if len(parts) == 3 and parts[0] == b'element' and parts[1] == b'face':
+                return "mesh" if int(parts[2]) > 0 else "pointcloud"
+        return "pointcloud"
+    except (OSError, ValueError):
+        return None
+
+
 def load_point_cloud_data(file_path):
     """
     Load point cloud data from a PLY file
@@ -256,21 +414,54 @@ def load_point_cloud_data(file_path):
     if pcd_type == o3d.io.FileGeometry.CONTAINS_TRIANGLES:
         logger.info(f"File contains triangles, loading as mesh")
         geometry = o3d.io.read_triangle_mesh(file_path)
-        coords = np.array(geometry.vertices)
-        colors = np.array(geometry.vertex_colors) if geometry.has_vertex_colors() else np.ones((len(coords), 3)) * 0.5
+        # asarray keeps a view over Open3D's buffer instead of copying it;
+        # the view holds a reference that keeps the buffer alive
+        coords = np.asarray(geometry.vertices)
+        colors = np.asarray(geometry.vertex_colors) if geometry.has_vertex_colors() \
+            else np.broadcast_to(np.float64(0.5), (len(coords), 3))
         is_point_cloud = False
         logger.info(f"Loaded mesh with {len(coords)} vertices")
     else:
         logger.info(f"File contains points, loading as point cloud")
         geometry = o3d.io.read_point_cloud(file_path)
-        coords = np.array(geometry.points)
-        colors = np.array(geometry.colors) if geometry.has_colors() else np.ones((len(coords), 3)) * 0.5
+        coords = np.asarray(geometry.points)
+        colors = np.asarray(geometry.colors) if geometry.has_colors() \
+            else np.broadcast_to(np.float64(0.5), (len(coords), 3))
         is_point_cloud = True
         logger.info(f"Loaded point cloud with {len(coords)} points")
 
     return coords, colors, is_point_cloud
 
 
+def get_obj_colors(obj_ids, normalize=True):
+    """
+    Vectorized counterpart of get_obj_color: compute the colors for a whole
+    array of object IDs with ufuncs instead of per-ID Python branching.
+
+    Args:
+        obj_ids (np.ndarray): Array of object IDs
+        normalize (bool): Whether to return 0-1 floats (True) or 0-255 ints
+
+    Returns:
+        np.ndarray: (len(obj_ids), 3) array of RGB values
+    """
+    obj_ids = np.asarray(obj_ids)
+    h = ((obj_ids * 50) % 360) / 360.0
+
+    # With the fixed saturation=1.0 and lightness=0.5 the HSL conversion
+    # collapses to q=1, p=0, so each channel is hue_to_rgb at h+1/3, h, h-1/3
+    t = np.stack([(h + 1 / 3) % 1.0, h % 1.0, (h - 1 / 3) % 1.0], axis=-1)
+    rgb = np.select(
+        [t < 1 / 6, t < 1 / 2, t < 2 / 3],
+        [6 * t, np.ones_like(t), (2 / 3 - t) * 6],
+        default=0.0
+    )
+
+    if normalize:
+        return rgb
+    return (rgb * 255).astype(int)
+
+
 def get_obj_color(obj_id, normalize=True):
     """
     Generate a color for an object ID using HSL color space,
@@ -284,6 +475,13 @@ def get_obj_color(obj_id, normalize=True):
     Returns:
         list: [r, g, b] color values
     """
+    # The palette only depends on (obj_id, normalize) and the same IDs come
+    # up over and over; return a fresh list so callers can still mutate it
+    return list(_get_obj_color_cached(int(obj_id), normalize))
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_obj_color_cached(obj_id, normalize):
     # Use the same algorithm as the frontend's getColorFromIndex
     # In the frontend: const hue = (index * 50) % 360;
     hue = (obj_id * 50) % 360
@@ -327,7 +525,7 @@ def get_obj_color(obj_id, normalize=True):
     # Return values based on normalization preference
     if normalize:
         # Already in 0-1 range
-        return [r, g, b]
+        return (r, g, b)
     else:
         # Convert to 0-255 range
-        return [int(r * 255), int(g * 255), int(b * 255)]
+        return (int(r * 255), int(g * 255), int(b * 255))
@@ -1,6 +1,10 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import threading
 import time
 import asyncio
 from datetime import datetime
@@ -30,15 +34,65 @@ console_handler.setLevel(logging.INFO)
 formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 console_handler.setFormatter(formatter)
 
+class BufferedFileHandler(logging.FileHandler):
+    """FileHandler that batches records in a 64 KB buffer.
+
+    The stock handler flushes after every record, turning bursty logging
+    into one write syscall per line. Here only WARNING+ records flush
+    immediately; everything else is pushed out by a 1 s background timer
+    (and logging.shutdown at exit), which bounds data loss on a crash.
+    """
+
+    _FLUSH_INTERVAL = 1.0
+
+    def __init__(self, filename, mode='a', encoding=None):
+        super().__init__(filename, mode=mode, encoding=encoding)
+        self._schedule_flush()
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=65536, encoding=self.encoding)
+
+    def _schedule_flush(self):
+        self._timer = threading.Timer(self._FLUSH_INTERVAL, self._interval_flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _interval_flush(self):
+        self.flush()
+        self._schedule_flush()
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self._timer.cancel()
+        super().close()
+
+
 # Create file handler for rotating logs
 current_date = datetime.now().strftime("%Y-%m-%d")
-file_handler = logging.FileHandler(logs_dir / f"agile3d_{current_date}.log")
+file_handler = BufferedFileHandler(logs_dir / f"agile3d_{current_date}.log")
 file_handler.setLevel(logging.INFO)
 file_handler.setFormatter(formatter)
 
-# Add handlers to the logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# Route records through a queue so hot paths (StepTimer, @timed) only pay
+# for an enqueue; the console/file writes happen on a background thread
+# instead of blocking the caller (or the event loop) on I/O
+log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+queue_listener = logging.handlers.QueueListener(
+    log_queue, console_handler, file_handler, respect_handler_level=True
+)
+queue_listener.start()
+atexit.register(queue_listener.stop)
 
 # Remove any duplicate handlers that might be inherited from root
 logger.propagate = False
@@ -57,10 +111,9 @@ def timed(func=None, level=logging.INFO):
             async def async_wrapper(*args, **kwargs):
                 func_name = f.__name__
                 logger.log(level, f"Starting {func_name}")
-                start_time = time.time()
+                start_ns = time.perf_counter_ns()
                 result = await f(*args, **kwargs)
-                end_time = time.time()
-                duration = end_time - start_time
+                duration = (time.perf_counter_ns() - start_ns) * 1e-9
                 logger.log(level, f"Completed {func_name} in {duration:.3f} seconds")
                 return result
             return async_wrapper
@@ -70,10 +123,9 @@ def timed(func=None, level=logging.INFO):
             def sync_wrapper(*args, **kwargs):
                 func_name = f.__name__
                 logger.log(level, f"Starting {func_name}")
-                start_time = time.time()
+                start_ns = time.perf_counter_ns()
                 result = f(*args, **kwargs)
-                end_time = time.time()
-                duration = end_time - start_time
+                duration = (time.perf_counter_ns() - start_ns) * 1e-9
                 logger.log(level, f"Completed {func_name} in {duration:.3f} seconds")
                 return result
             return sync_wrapper
@@ -90,15 +142,16 @@ class StepTimer:
     def __init__(self, step_name, level=logging.INFO):
         self.step_name = step_name
         self.level = level
-        self.start_time = None
+        self.start_ns = None
 
     def __enter__(self):
-        self.start_time = time.time()
+        # perf_counter is monotonic, so the delta is immune to NTP steps
+        self.start_ns = time.perf_counter_ns()
         logger.log(self.level, f"Starting step: {self.step_name}")
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = time.time() - self.start_time
+        duration = (time.perf_counter_ns() - self.start_ns) * 1e-9
         logger.log(self.level, f"Completed step: {self.step_name} in {duration:.3f} seconds")
         if exc_type:
             logger.error(f"Error in {self.step_name}: {exc_val}")
@@ -107,12 +160,12 @@ class StepTimer:
 
     # Add async context manager support
     async def __aenter__(self):
-        self.start_time = time.time()
+        self.start_ns = time.perf_counter_ns()
         logger.log(self.level, f"Starting step: {self.step_name}")
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        duration = time.time() - self.start_time
+        duration = (time.perf_counter_ns() - self.start_ns) * 1e-9
         logger.log(self.level, f"Completed step: {self.step_name} in {duration:.3f} seconds")
         if exc_type:
             logger.error(f"Error in {self.step_name}: {exc_val}")
@@ -3,31 +3,32 @@ from pathlib import Path
 import open3d as o3d
 import numpy as np
 
-scan_path = Path("interactive_dataset/scene_00_reconstructed_00/scan.ply")
-transformed_path = scan_path.with_stem('transformed_mesh')
-
-# Read the point cloud from 'scan.ply'
-pcd = o3d.io.read_triangle_mesh(scan_path)
-print(f"Loaded point cloud with {len(pcd.vertices)} points")
-
-# Define the rotation matrix (R)
-R = np.array([
+# Default rotation matrix (R) and translation vector (t) for the demo scene
+DEFAULT_R = np.array([
     [0.99204412, 0.09793481, -0.07910274],
     [0.09793481, -0.20555151, 0.97373372],
     [0.07910274, -0.97373372, -0.21350739]
 ])
+DEFAULT_T = np.array([0.0, 0.0, 1.14547409])
+
+
+def normalize(scan_path: Path, out_path: Path, R: np.ndarray = DEFAULT_R, t: np.ndarray = DEFAULT_T) -> Path:
+    """Apply a rigid transform to a mesh and write the result.
+
+    The transform is applied as one matmul over the vertex array instead
+    of open3d's per-vertex 4x4 transform loop.
+    """
+    mesh = o3d.io.read_triangle_mesh(scan_path)
+    print(f"Loaded point cloud with {len(mesh.vertices)} points")
 
-# Define the translation vector (t)
-t = np.array([0.0, 0.0, 1.14547409])
+    vertices = np.asarray(mesh.vertices)
+    vertices[:] = vertices @ R.T + t
 
-# Create a 4x4 transformation matrix
-transform = np.eye(4)  # Initialize as identity matrix
-transform[:3, :3] = R  # Set the top-left 3x3 block as the rotation matrix
-transform[:3, 3] = t   # Set the first three elements of the last column as the translation vector
+    o3d.io.write_triangle_mesh(out_path, mesh)
+    print(f"Transformed point cloud saved as '{out_path}'")
+    return out_path
 
-# Apply the transformation to the point cloud
-pcd.transform(transform)
 
-# Save the transformed point cloud to 'transformed_scan.ply'
-o3d.io.write_triangle_mesh(transformed_path, pcd)
-print(f"Transformed point cloud saved as '{transformed_path}'")
\ No newline at end of file
+if __name__ == '__main__':
+    scan_path = Path("interactive_dataset/scene_00_reconstructed_00/scan.ply")
+    normalize(scan_path, scan_path.with_stem('transformed_mesh'))
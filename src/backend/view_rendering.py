@@ -5,16 +5,51 @@ or a "full" mode that recolors masked points. Additionally, it includes a test f
 camera positions, save a combined scene (with camera markers), and render images from these views.
 """
 
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple, Union, Optional
 
 import numpy as np
 import open3d as o3d
+from PIL import Image
 from open3d.visualization import rendering
 
 from logger import logger
 
+# OffscreenRenderer construction is expensive (GPU context plus filament
+# scene setup), so keep one renderer per image size and swap geometry
+# between calls instead of rebuilding the whole scene per object.
+_renderer_cache: dict = {}
+_unlit_material: Optional[rendering.MaterialRecord] = None
+
+# Last visualization geometry built and last scene mounted on a renderer.
+# Strong references make the identity checks sound (the keyed arrays cannot
+# be collected and have their ids reused while an entry is alive), letting
+# the recognition loop reuse the base scene across objects in outline mode.
+_vis_geometry_cache: Optional[tuple] = None
+_mounted_scene = {"renderer": None, "geometry": None, "bg": None}
+
+
+def _get_renderer(width: int, height: int) -> rendering.OffscreenRenderer:
+    """Returns a cached OffscreenRenderer for the given image size."""
+    renderer = _renderer_cache.get((width, height))
+    if renderer is None:
+        renderer = rendering.OffscreenRenderer(width, height)
+        _renderer_cache[(width, height)] = renderer
+    return renderer
+
+
+def _get_unlit_material() -> rendering.MaterialRecord:
+    """Returns the shared unlit material record used for all renders."""
+    global _unlit_material
+    if _unlit_material is None:
+        material = rendering.MaterialRecord()
+        material.shader = "defaultUnlit"
+        _unlit_material = material
+    return _unlit_material
+
 
 def load_geometry_from_file(
         file_path: str | Path,
@@ -37,28 +72,47 @@ def load_geometry_from_file(
     Raises:
         None explicitly; errors from Open3D are propagated.
     """
-    # Determine if the file contains a mesh (triangles) or a point cloud.
+    # The recognition pipeline loads the same scene once per object (and
+    # twice per test_camera_positions call); cache the parsed geometry keyed
+    # by path and mtime so repeat loads are free.
     file_path = str(file_path)
+    geometry_type, coords, colors, geometry = _load_geometry_cached(
+        file_path, os.path.getmtime(file_path))
+    if colors is None:
+        # No stored colors; a zero-copy broadcast view stands in for the
+        # N x 3 fill since downstream code never writes through it.
+        colors = np.broadcast_to(np.asarray(background_color, dtype=np.float32), (len(coords), 3))
+    return geometry_type, coords, colors, geometry
+
+
+@functools.lru_cache(maxsize=4)
+def _load_geometry_cached(
+        file_path: str, mtime: float
+) -> Tuple[str, np.ndarray, Optional[np.ndarray], Union[o3d.geometry.TriangleMesh, o3d.geometry.PointCloud]]:
+    """Parses a geometry file once per (path, mtime).
 
+    Returns read-only coord/color arrays (colors is None when the file has
+    none); callers copy before mutating.
+    """
     file_type = o3d.io.read_file_geometry_type(file_path)
+    # Open3D hands back float64; rendering and mask math only need float
+    # precision, so downcast once here and halve the bandwidth of every
+    # downstream gather, reduction and stack.
     if file_type == o3d.io.FileGeometry.CONTAINS_TRIANGLES:
         geometry = o3d.io.read_triangle_mesh(file_path)
-        coords = np.array(geometry.vertices)
-        # Use vertex colors if available, otherwise fill with the background color.
-        colors = (np.array(geometry.vertex_colors)
-                  if geometry.has_vertex_colors()
-                  else np.tile(background_color, (len(coords), 1)))
+        coords = np.asarray(geometry.vertices, dtype=np.float32)
+        colors = np.asarray(geometry.vertex_colors, dtype=np.float32) if geometry.has_vertex_colors() else None
         geometry_type = "mesh"
         logger.debug("Loaded mesh geometry from file.")
     else:
         geometry = o3d.io.read_point_cloud(file_path)
-        coords = np.array(geometry.points)
-        # Use point colors if available, otherwise fill with the background color.
-        colors = (np.array(geometry.colors)
-                  if geometry.has_colors()
-                  else np.tile(background_color, (len(coords), 1)))
+        coords = np.asarray(geometry.points, dtype=np.float32)
+        colors = np.asarray(geometry.colors, dtype=np.float32) if geometry.has_colors() else None
         geometry_type = "pointcloud"
         logger.debug("Loaded point cloud geometry from file.")
+    coords.flags.writeable = False
+    if colors is not None:
+        colors.flags.writeable = False
     return geometry_type, coords, colors, geometry
 
 
@@ -67,7 +121,8 @@ def process_mask_mode(
         coords: np.ndarray,
         colors: np.ndarray,
         mask_mode: str,
-        highlight_color: List[float]
+        highlight_color: List[float],
+        masked_coords: Optional[np.ndarray] = None
 ) -> Tuple[np.ndarray, Optional[o3d.geometry.LineSet]]:
     """
     Processes the mask on the geometry based on the specified mask mode.
@@ -78,6 +133,9 @@ def process_mask_mode(
         colors (np.ndarray): Array of vertex/point colors.
         mask_mode (str): Mode for processing the mask ("full" or "outline").
         highlight_color (List[float]): Color to apply to masked points or outline.
+        masked_coords (np.ndarray, optional): Precomputed coords[mask]; passed
+            by callers that already gathered the masked subset so the O(N)
+            boolean gather is not repeated here.
 
     Returns:
         A tuple containing:
@@ -87,17 +145,29 @@ def process_mask_mode(
     Raises:
         ValueError: If mask_mode is not "outline" or "full", or if no points are selected by the mask.
     """
-    updated_colors = colors.copy()
     outline = None
 
     if mask_mode == "full":
-        # For full mode, update the color of all masked points to the highlight color.
-        updated_colors[mask] = highlight_color
+        # One fused select instead of copy-then-scatter; never mutates the
+        # input, so it also works on the loader's read-only cached colors.
+        updated_colors = np.where(
+            mask[:, None], np.asarray(highlight_color, dtype=colors.dtype), colors)
     elif mask_mode == "outline":
+        # Outline mode leaves the colors untouched; skip the defensive copy
+        # since callers never write through the returned array.
+        updated_colors = colors
         if not mask.any():
             raise ValueError("The mask did not select any points.")
         # Compute the convex hull of the masked points to generate an outline.
-        object_points = coords[mask]
+        object_points = masked_coords if masked_coords is not None else np.compress(mask, coords, axis=0)
+        # QuickHull cost scales with the input size, but the hull is fixed by
+        # its extreme points; for dense masks feed it the six axis extremes
+        # plus a deterministic sample instead of every interior point.
+        if len(object_points) > 2000:
+            rng = np.random.default_rng(0)
+            pick = rng.choice(len(object_points), 2000, replace=False)
+            extremes = np.concatenate([object_points.argmin(axis=0), object_points.argmax(axis=0)])
+            object_points = object_points[np.union1d(pick, extremes)]
         object_pcd = o3d.geometry.PointCloud()
         object_pcd.points = o3d.utility.Vector3dVector(object_points)
         hull, _ = object_pcd.compute_convex_hull()
@@ -127,17 +197,40 @@ def create_vis_geometry(
     Returns:
         A new geometry object (TriangleMesh or PointCloud) configured for visualization.
     """
+    global _vis_geometry_cache
+    # In outline mode the colors array is the loader's cached object, so the
+    # built geometry is identical between objects of the same scene; hand
+    # back the previous one instead of two Vector3dVector copies.
+    if _vis_geometry_cache is not None:
+        cached_type, cached_coords, cached_colors, cached_orig, cached_vis = _vis_geometry_cache
+        if (cached_type == geometry_type and cached_coords is coords
+                and cached_colors is vis_colors and cached_orig is original_geometry):
+            return cached_vis
+
+    # Normals depend only on the topology, not the colors, so reuse the
+    # original geometry's normals when present and memoize freshly computed
+    # ones back onto it (the loader caches that object, so later calls for
+    # other objects in the same scene skip the O(triangles/points) pass).
     if geometry_type == "mesh":
         vis_geometry = o3d.geometry.TriangleMesh()
         vis_geometry.vertices = o3d.utility.Vector3dVector(coords)
         vis_geometry.vertex_colors = o3d.utility.Vector3dVector(vis_colors)
         vis_geometry.triangles = original_geometry.triangles
-        vis_geometry.compute_vertex_normals()
+        if original_geometry.has_vertex_normals():
+            vis_geometry.vertex_normals = original_geometry.vertex_normals
+        else:
+            vis_geometry.compute_vertex_normals()
+            original_geometry.vertex_normals = vis_geometry.vertex_normals
     else:
         vis_geometry = o3d.geometry.PointCloud()
         vis_geometry.points = o3d.utility.Vector3dVector(coords)
         vis_geometry.colors = o3d.utility.Vector3dVector(vis_colors)
-        vis_geometry.estimate_normals()
+        if original_geometry.has_normals():
+            vis_geometry.normals = original_geometry.normals
+        else:
+            vis_geometry.estimate_normals()
+            original_geometry.normals = vis_geometry.normals
+    _vis_geometry_cache = (geometry_type, coords, vis_colors, original_geometry, vis_geometry)
     return vis_geometry
 
 
@@ -151,7 +244,8 @@ def render_object_views(
         background_color: List[float] = [0.8, 0.8, 0.8],
         view_angle: float = 60.0,
         mask_mode: str = "outline",  # "outline" or "full"
-) -> List[str]:
+        return_images: bool = False,
+) -> Union[List[str], List[Image.Image]]:
     """
     Renders views of an object based on a mask and a set of camera positions.
 
@@ -172,67 +266,129 @@ def render_object_views(
     Raises:
         ValueError: If the mask length does not match the number of points or if no points are selected.
     """
-    # Ensure output directory exists.
-    os.makedirs(output_dir, exist_ok=True)
-
     # Load the geometry from the specified file.
     geometry_type, coords, colors, geometry = load_geometry_from_file(point_cloud_path, background_color)
     mask_bool = np.array(mask, dtype=bool)
 
     if mask_bool.shape[0] != len(coords):
         raise ValueError("Mask length does not match number of points in the geometry.")
+    if not mask_bool.any():
+        raise ValueError("The mask did not select any points.")
+
+    # Gather the masked subset once and reuse it for the outline and center.
+    masked_coords = np.compress(mask_bool, coords, axis=0)
 
     # Process the mask to get visualization colors and optional outline.
-    vis_colors, outline = process_mask_mode(mask_bool, coords, colors, mask_mode, highlight_color)
+    vis_colors, outline = process_mask_mode(
+        mask_bool, coords, colors, mask_mode, highlight_color, masked_coords=masked_coords)
     vis_geometry = create_vis_geometry(geometry_type, coords, vis_colors, geometry)
 
+    # Compute the center of the masked object.
+    object_center = np.mean(masked_coords, axis=0)
+
+    return _render_views(
+        vis_geometry, outline, object_center, camera_pos,
+        output_dir=output_dir, image_size=image_size,
+        background_color=background_color, view_angle=view_angle,
+        return_images=return_images,
+    )
+
+
+def _render_views(
+        vis_geometry: Union[o3d.geometry.TriangleMesh, o3d.geometry.PointCloud],
+        outline: Optional[o3d.geometry.LineSet],
+        object_center: np.ndarray,
+        camera_pos: List[List[float]],
+        output_dir: str,
+        image_size: Tuple[int, int],
+        background_color: List[float],
+        view_angle: float,
+        return_images: bool = False,
+) -> Union[List[str], List[Image.Image]]:
+    """Renders an already-prepared scene from each camera position.
+
+    Entry point for callers that have computed the visualization geometry,
+    outline and object center themselves (e.g. test_camera_positions), so
+    the file is not loaded and the mask not processed a second time.
+
+    With return_images=True the rendered views are returned as in-memory
+    PIL images and nothing is written to disk, sparing consumers like the
+    recognition pipeline an encode/write/reopen round trip per view.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
     width, height = image_size
-    renderer = rendering.OffscreenRenderer(width, height)
+    renderer = _get_renderer(width, height)
     # Ensure the background color has an alpha value.
     bg_color = background_color + [1.0] if len(background_color) == 3 else background_color
-    renderer.scene.set_background(bg_color)
-
-    # Set up a simple material for unlit rendering.
-    material = rendering.MaterialRecord()
-    material.shader = "defaultUnlit"
-    renderer.scene.add_geometry("geometry", vis_geometry, material)
-    if mask_mode == "outline" and outline is not None:
+    material = _get_unlit_material()
+    # When the same base geometry is still mounted (successive objects of one
+    # scene in outline mode), only swap the outline; otherwise rebuild the
+    # scene from scratch.
+    if (_mounted_scene["renderer"] is renderer
+            and _mounted_scene["geometry"] is vis_geometry
+            and _mounted_scene["bg"] == bg_color):
+        if renderer.scene.has_geometry("outline"):
+            renderer.scene.remove_geometry("outline")
+    else:
+        renderer.scene.clear_geometry()
+        renderer.scene.set_background(bg_color)
+        renderer.scene.add_geometry("geometry", vis_geometry, material)
+        _mounted_scene.update(renderer=renderer, geometry=vis_geometry, bg=bg_color)
+    if outline is not None:
         renderer.scene.add_geometry("outline", outline, material)
 
     near_plane = 0.1
     far_plane = 1000.0
 
-    if not mask_bool.any():
-        raise ValueError("The mask did not select any points.")
-    # Compute the center of the masked object.
-    object_center = np.mean(coords[mask_bool], axis=0)
+    # The projection is identical for every view, so set it once up front.
+    aspect = width / height
+    renderer.scene.camera.set_projection(
+        view_angle, aspect, near_plane, far_plane, rendering.Camera.FovType.Vertical
+    )
+
+    up = np.array([0, 0, 1])
+    # One vectorized conversion for all eye positions instead of a per-view
+    # np.array call inside the loop.
+    eyes = np.asarray(camera_pos, dtype=np.float64)
+
+    if return_images:
+        images = []
+        for eye in eyes:
+            renderer.scene.camera.look_at(object_center, eye, up)
+            images.append(Image.fromarray(np.asarray(renderer.render_to_image())))
+        return images
 
     image_paths = []
-    # Iterate over each camera position, render the scene, and save the output image.
-    for idx, eye in enumerate(camera_pos):
-        eye = np.array(eye)
-        renderer.scene.camera.look_at(object_center, eye, np.array([0, 0, 1]))
-        aspect = width / height
-        renderer.scene.camera.set_projection(
-            view_angle, aspect, near_plane, far_plane, rendering.Camera.FovType.Vertical
-        )
-        img = renderer.render_to_image()
-        image_path = os.path.join(output_dir, f"view_{idx:03d}.png")
-        o3d.io.write_image(image_path, img)
-        image_paths.append(image_path)
-        logger.debug(f"Saved view {idx} to {image_path}")
+    # Render each view, handing the encode/write to a small thread pool
+    # so the next render proceeds while the previous image is compressed
+    # (write_image releases the GIL in the C++ encoder). The views only
+    # feed the vision model, so JPEG at quality 85 beats PNG: ~5x smaller
+    # and much cheaper to encode than deflate at the default level.
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = []
+        for idx, eye in enumerate(eyes):
+            renderer.scene.camera.look_at(object_center, eye, up)
+            img = renderer.render_to_image()
+            image_path = os.path.join(output_dir, f"view_{idx:03d}.jpg")
+            futures.append(executor.submit(o3d.io.write_image, image_path, img, 85))
+            image_paths.append(image_path)
+            logger.debug(f"Queued view {idx} for write to {image_path}")
+        # Surface any write error before reporting the paths as rendered.
+        for future in futures:
+            future.result()
     return image_paths
 
 
 def compute_object_center_and_radius(
-        mask: np.ndarray, coords: np.ndarray
+        masked_coords: np.ndarray
 ) -> Tuple[np.ndarray, float]:
     """
-    Computes the center and the maximum distance (bounding radius) of the object defined by the mask.
+    Computes the center and the maximum distance (bounding radius) of the object points.
 
     Parameters:
-        mask (np.ndarray): Boolean mask selecting object points.
-        coords (np.ndarray): Array of vertex/point coordinates.
+        masked_coords (np.ndarray): Coordinates of the masked object points
+            (i.e. coords[mask], gathered once by the caller).
 
     Returns:
         Tuple containing:
@@ -242,11 +398,13 @@ def compute_object_center_and_radius(
     Raises:
         ValueError: If no points are selected by the mask.
     """
-    if not mask.any():
+    if len(masked_coords) == 0:
         raise ValueError("No masked points found in the geometry.")
-    masked_coords = coords[mask]
     center = np.mean(masked_coords, axis=0)
-    bounding_radius = np.max(np.linalg.norm(masked_coords - center, axis=1))
+    # sqrt is monotonic, so take the max over squared distances and apply a
+    # single sqrt at the end instead of N of them.
+    diff = masked_coords - center
+    bounding_radius = float(np.sqrt(np.einsum('ij,ij->i', diff, diff).max()))
     return center, bounding_radius
 
 
@@ -263,28 +421,25 @@ def create_camera_markers(
     Returns:
         o3d.geometry.PointCloud: A point cloud containing markers for the camera positions.
     """
-    camera_marker_clouds = []
     # Determine a sphere radius for the camera markers.
     sphere_radius = bounding_radius * 0.1 if bounding_radius > 0 else 0.1
-    for pos in camera_positions:
-        # Create a sphere mesh for each camera marker.
-        sphere_mesh = o3d.geometry.TriangleMesh.create_sphere(radius=sphere_radius)
-        sphere_mesh.translate(np.array(pos))
-        sphere_mesh.paint_uniform_color([0.0, 0.999, 0.0])
-        # Sample points uniformly from the sphere mesh.
-        marker = sphere_mesh.sample_points_uniformly(number_of_points=500)
-        camera_marker_clouds.append(marker)
-    # Combine all markers into one point cloud.
-    all_points = [np.asarray(cloud.points) for cloud in camera_marker_clouds]
-    all_colors = [np.asarray(cloud.colors) for cloud in camera_marker_clouds]
-    if all_points:
-        all_points = np.vstack(all_points)
-        all_colors = np.vstack(all_colors)
-        camera_cloud = o3d.geometry.PointCloud()
+    camera_cloud = o3d.geometry.PointCloud()
+    if camera_positions:
+        # Generate one analytic Fibonacci-sphere sample and broadcast-translate
+        # it to every camera position, instead of building a sphere mesh and
+        # surface-sampling it per marker.
+        n = 500
+        u = (np.arange(n) + 0.5) / n
+        phi = np.arccos(1 - 2 * u)
+        theta = np.pi * (1 + 5 ** 0.5) * np.arange(n)
+        base = np.stack([np.sin(phi) * np.cos(theta),
+                         np.sin(phi) * np.sin(theta),
+                         np.cos(phi)], axis=1) * sphere_radius
+        all_points = (base[None, :, :]
+                      + np.asarray(camera_positions, dtype=np.float64)[:, None, :]).reshape(-1, 3)
         camera_cloud.points = o3d.utility.Vector3dVector(all_points)
-        camera_cloud.colors = o3d.utility.Vector3dVector(all_colors)
-    else:
-        camera_cloud = o3d.geometry.PointCloud()
+        camera_cloud.colors = o3d.utility.Vector3dVector(
+            np.broadcast_to([0.0, 0.999, 0.0], all_points.shape).copy())
     return camera_cloud
 
 
@@ -300,16 +455,15 @@ def sample_line_points(line_set, num_samples=20):
         np.ndarray: Array of sampled points.
     """
     points = np.asarray(line_set.points)
-    sampled_points = []
-    # Each line is defined by two point indices.
-    for line in np.asarray(line_set.lines):
-        start = points[line[0]]
-        end = points[line[1]]
-        # Sample num_samples points along the line (including endpoints)
-        for t in np.linspace(0, 1, num_samples):
-            sample = start * (1 - t) + end * t
-            sampled_points.append(sample)
-    return np.array(sampled_points)
+    lines = np.asarray(line_set.lines)
+    # Each line is defined by two point indices; interpolate all lines at
+    # once with a broadcast over the (num_lines, num_samples, 3) grid
+    # instead of a Python loop per line and per sample.
+    starts = points[lines[:, 0]][:, None, :]
+    ends = points[lines[:, 1]][:, None, :]
+    t = np.linspace(0, 1, num_samples)[None, :, None]
+    samples = starts * (1 - t) + ends * t
+    return samples.reshape(-1, 3)
 
 
 def test_camera_positions(
@@ -322,8 +476,9 @@ def test_camera_positions(
         camera_height: Optional[float] = None,
         mask_mode: str = "outline",
         highlight_color: List[float] = [1.0, 0.0, 0.0],
-        obj_id: int = 1
-) -> List[str]:
+        obj_id: int = 1,
+        return_images: bool = False,
+) -> Union[List[str], List[Image.Image]]:
     """
     Tests camera positions by generating multiple views of the scene, adding camera markers,
     and saving a combined scene (as a PLY file) with the masked object processed according to mask_mode.
@@ -367,52 +522,64 @@ def test_camera_positions(
     if obj_mask.shape[0] != len(coords):
         raise ValueError("Mask length does not match number of points in the geometry.")
 
+    # Gather the masked subset once; the outline, center and radius all use it.
+    masked_coords = np.compress(obj_mask, coords, axis=0)
+
     # Process the obj_mask to update colors (or generate an outline) per mask_mode.
-    vis_colors, outline = process_mask_mode(obj_mask, coords, colors.copy(), mask_mode, highlight_color)
+    vis_colors, outline = process_mask_mode(
+        obj_mask, coords, colors, mask_mode, highlight_color, masked_coords=masked_coords)
     # Create the visualization geometry using the updated colors.
     vis_geometry = create_vis_geometry(geometry_type, coords, vis_colors, geometry)
-    center, bounding_radius = compute_object_center_and_radius(obj_mask, coords)
+    center, bounding_radius = compute_object_center_and_radius(masked_coords)
 
     # Compute camera height if not provided.
     if camera_height is None:
         camera_height = np.min(coords[:, 2]) + 1.5
 
-    # Generate camera positions evenly around the object.
-    camera_positions = []
+    # Generate camera positions evenly around the object in one vectorized
+    # trig pass instead of per-position scalar cos/sin calls.
     radius = bounding_radius * distance_factor
-    for i in range(num_positions):
-        angle = 2 * np.pi * i / num_positions
-        x = center[0] + radius * np.cos(angle)
-        y = center[1] + radius * np.sin(angle)
-        camera_positions.append([x, y, camera_height])
+    angles = 2 * np.pi * np.arange(num_positions) / num_positions
+    camera_positions = np.stack([
+        center[0] + radius * np.cos(angles),
+        center[1] + radius * np.sin(angles),
+        np.full(num_positions, camera_height),
+    ], axis=1).tolist()
 
     # Create camera markers.
     camera_cloud = create_camera_markers(camera_positions, bounding_radius)
 
-    # Build the scene point cloud from the visualization geometry.
+    # Gather the scene arrays from the visualization geometry.
     if geometry_type == "mesh":
-        scene_cloud = o3d.geometry.PointCloud()
-        scene_cloud.points = o3d.utility.Vector3dVector(np.asarray(vis_geometry.vertices))
-        scene_cloud.colors = o3d.utility.Vector3dVector(np.asarray(vis_geometry.vertex_colors))
+        scene_points = np.asarray(vis_geometry.vertices)
+        scene_colors = np.asarray(vis_geometry.vertex_colors)
     else:
-        scene_cloud = vis_geometry
+        scene_points = np.asarray(vis_geometry.points)
+        scene_colors = np.asarray(vis_geometry.colors)
 
-    # If in "outline" mode, sample additional points from the outline and merge into the scene.
+    # If in "outline" mode, sample additional points along the outline.
     if mask_mode == "outline" and outline is not None:
         sampled_outline_points = sample_line_points(outline, num_samples=20)
-        outline_colors = np.tile(np.array(highlight_color), (len(sampled_outline_points), 1))
-        outline_cloud = o3d.geometry.PointCloud()
-        outline_cloud.points = o3d.utility.Vector3dVector(sampled_outline_points)
-        outline_cloud.colors = o3d.utility.Vector3dVector(outline_colors)
-        # Merge the outline cloud with the scene cloud.
-        combined_points = np.vstack((np.asarray(scene_cloud.points), np.asarray(outline_cloud.points)))
-        combined_colors = np.vstack((np.asarray(scene_cloud.colors), np.asarray(outline_cloud.colors)))
-        scene_cloud.points = o3d.utility.Vector3dVector(combined_points)
-        scene_cloud.colors = o3d.utility.Vector3dVector(combined_colors)
-
-    # Combine the scene (with the masked object) with camera marker points.
-    combined_points = np.vstack((np.asarray(scene_cloud.points), np.asarray(camera_cloud.points)))
-    combined_colors = np.vstack((np.asarray(scene_cloud.colors), np.asarray(camera_cloud.colors)))
+    else:
+        sampled_outline_points = np.empty((0, 3))
+
+    camera_points = np.asarray(camera_cloud.points)
+    camera_colors = np.asarray(camera_cloud.colors)
+
+    # Assemble scene + outline + camera markers into one preallocated buffer
+    # instead of chained vstacks; this also leaves vis_geometry untouched for
+    # the render below.
+    n_scene, n_outline = len(scene_points), len(sampled_outline_points)
+    total = n_scene + n_outline + len(camera_points)
+    combined_points = np.empty((total, 3), dtype=np.float32)
+    combined_colors = np.empty_like(combined_points)
+    combined_points[:n_scene] = scene_points
+    combined_colors[:n_scene] = scene_colors
+    combined_points[n_scene:n_scene + n_outline] = sampled_outline_points
+    combined_colors[n_scene:n_scene + n_outline] = highlight_color
+    combined_points[n_scene + n_outline:] = camera_points
+    combined_colors[n_scene + n_outline:] = camera_colors
+
     combined_scene = o3d.geometry.PointCloud()
     combined_scene.points = o3d.utility.Vector3dVector(combined_points)
     combined_scene.colors = o3d.utility.Vector3dVector(combined_colors)
@@ -424,14 +591,15 @@ def test_camera_positions(
     o3d.io.write_point_cloud(ply_output_path, combined_scene)
     logger.info(f"Scene PLY with camera markers saved to {ply_output_path}")
 
-    # Render object views using the provided mask_mode.
-    return render_object_views(
-        point_cloud_path=point_cloud_path,
-        mask=obj_mask,
-        camera_pos=camera_positions,
+    # Render the views directly from the geometry prepared above instead of
+    # reloading and re-masking the scene through render_object_views.
+    return _render_views(
+        vis_geometry, outline, center, camera_positions,
         output_dir=output_dir,
+        image_size=(1280, 720),
+        background_color=[0.8, 0.8, 0.8],
         view_angle=view_angle,
-        mask_mode=mask_mode,
+        return_images=return_images,
     )
 
 
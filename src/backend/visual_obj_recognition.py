@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 from pathlib import Path
@@ -6,7 +7,6 @@ from typing import List, Tuple
 
 import httpx
 import numpy as np
-from PIL import Image
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
@@ -17,6 +17,18 @@ from logger import logger
 # Import the test_camera_positions function from view_rendering.py
 from view_rendering import test_camera_positions
 
+# Load environment variables once at import (e.g., for API keys)
+load_dotenv(override=True)
+
+TIMEOUT = 20000
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client(api_key: str, timeout: int) -> genai.Client:
+    """Returns a shared Gen AI client; construction is not free, so reuse it
+    across recognition calls instead of rebuilding per object."""
+    return genai.Client(api_key=api_key, http_options=types.HttpOptions(timeout=timeout))
+
 
 class ObjInfo(BaseModel):
     selected_views: List[int]
@@ -61,19 +73,13 @@ def mask_obj_recognition(point_cloud_path: str | Path, mask: np.ndarray | str, o
     Returns:
         Tuple[str, float]: A tuple where the first element is the response text from the model and the second element is the cost of the request.
     """
-    # Load environment variables (e.g., for API keys)
-    load_dotenv(override=True)
-
     # Get API key from environment variables
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY environment variable is not set. Please set it in the .env file.")
 
-    TIMEOUT = 20000
-
-    # Initialize the Google Gen AI client with your API key.
-    client = genai.Client(api_key=api_key,
-                          http_options=types.HttpOptions(timeout=TIMEOUT))  # 10s timeout
+    # Reuse the shared Google Gen AI client across calls.
+    client = _get_client(api_key, TIMEOUT)
 
     # Set mask mode for rendering (options: "outline" or "full")
     mask_mode = "outline"
@@ -81,8 +87,9 @@ def mask_obj_recognition(point_cloud_path: str | Path, mask: np.ndarray | str, o
     # Define the output directory for the rendered camera views.
     view_output_dir = f"./object_views/obj_{obj_id}"
 
-    # Generate camera views for the masked object.
-    view_paths = test_camera_positions(
+    # Generate camera views for the masked object, kept in memory — the
+    # encode-to-disk/reopen round trip is pure overhead on this path.
+    images = test_camera_positions(
         point_cloud_path=point_cloud_path,
         mask=mask,
         output_dir=view_output_dir,
@@ -92,19 +99,9 @@ def mask_obj_recognition(point_cloud_path: str | Path, mask: np.ndarray | str, o
         camera_height=1.5,
         mask_mode=mask_mode,
         obj_id=obj_id,
+        return_images=True,
     )
 
-    # Load the rendered images.
-    images = []
-    for path in view_paths:
-        if os.path.exists(path):
-            try:
-                images.append(Image.open(path))
-            except Exception as e:
-                logger.error(f"Error opening {path}: {e}")
-        else:
-            logger.warning(f"Warning: {path} not found.")
-
     # Construct the analysis prompt.
     prompt = (
         f"I have uploaded a series of rendered views of a scene generated using the '{mask_mode}' mask mode. "
@@ -3,7 +3,9 @@ import {
     ApiErrorInfo,
     InferenceRequest,
     InferenceResponse,
+    MaskObjectRecognitionRequest,
     MaskObjectRecognitionResponse,
+    MaskObjectRecognitionResult,
     UpdateObjectsRequest
 } from '@/types/apiService.types';
 
@@ -106,6 +108,10 @@ api.interceptors.response.use(
  * API Service for interacting with the backend
  */
 class ApiService {
+    // Session token returned by the last upload; sent with follow-up requests
+    // so the backend can address the right per-session state
+    private sessionId: string | null = null;
+
     /**
      * Upload a point cloud file to the server
      * @param file File containing the point cloud
@@ -136,7 +142,7 @@ class ApiService {
         console.log(`Making upload request to: ${endpoint}`);
 
         try {
-            return await axios({
+            const response = await axios({
                 method: 'post',
                 url: endpoint,
                 data: formData,
@@ -153,6 +159,10 @@ class ApiService {
                     console.log(`Upload progress: ${percentCompleted}%`);
                 }
             });
+
+            this.sessionId = response.data?.sessionId ?? null;
+
+            return response;
         } catch (error) {
             console.error('Upload error details:', error);
 
@@ -200,7 +210,7 @@ class ApiService {
 
         try {
             // Make request
-            return await api.post<InferenceResponse>('/infer', request);
+            return await api.post<InferenceResponse>('/infer', {...request, sessionId: this.sessionId});
         } catch (error) {
             // Enhanced error logging
             console.error('Inference request failed:', error);
@@ -213,23 +223,69 @@ class ApiService {
     }
 
     /**
-     * Run mask-based object recognition on the segmented point cloud
+     * Run mask-based object recognition on the segmented point cloud.
+     * The server streams one NDJSON line per recognized object, so results
+     * can be surfaced via onResult as they arrive instead of after the
+     * slowest object finishes.
      * @param mask Array of integer values representing the segmentation mask
-     * @returns Promise with object recognition results
+     * @param onResult Optional callback invoked with each streamed result
+     * @returns Promise with all object recognition results
      */
-    async runMaskObjectRecognition(mask: number[]): Promise<AxiosResponse<MaskObjectRecognitionResponse>> {
+    async runMaskObjectRecognition(
+        mask: number[],
+        onResult?: (result: MaskObjectRecognitionResult) => void
+    ): Promise<{ data: MaskObjectRecognitionResponse }> {
         console.log('Running object recognition with mask of length:', mask.length);
 
         try {
-            return await api.post<MaskObjectRecognitionResponse>('/mask_obj_recognition', {
-                mask: mask
+            // Pack the mask into a base64 byte buffer when the IDs fit in a
+            // byte - far smaller and faster to parse than a JSON number array
+            let body: MaskObjectRecognitionRequest;
+            if (mask.every(v => v >= 0 && v < 256)) {
+                const bytes = new Uint8Array(mask);
+                let binary = '';
+                const chunkSize = 0x8000;
+                for (let i = 0; i < bytes.length; i += chunkSize) {
+                    binary += String.fromCharCode(...bytes.subarray(i, i + chunkSize));
+                }
+                body = {mask_b64: btoa(binary), dtype: 'uint8', sessionId: this.sessionId};
+            } else {
+                body = {mask: mask, sessionId: this.sessionId};
+            }
+
+            // Use fetch so the NDJSON body can be consumed incrementally
+            const response = await fetch(`${api.defaults.baseURL}/mask_obj_recognition`, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify(body)
             });
+
+            if (!response.ok || !response.body) {
+                const text = await response.text().catch(() => '');
+                throw new Error(`Object recognition failed (${response.status}): ${text}`);
+            }
+
+            const results: MaskObjectRecognitionResult[] = [];
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            for (; ;) {
+                const {done, value} = await reader.read();
+                if (value) buffered += decoder.decode(value, {stream: true});
+                const lines = buffered.split('\n');
+                buffered = done ? '' : lines.pop() ?? '';
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const item = JSON.parse(line) as MaskObjectRecognitionResult;
+                    results.push(item);
+                    onResult?.(item);
+                }
+                if (done) break;
+            }
+
+            return {data: {message: 'Mask object recognition completed successfully', result: results}};
         } catch (error) {
             console.error('object recognition failed:', error);
-            if (axios.isAxiosError(error) && error.response) {
-                console.error('Response status:', error.response.status);
-                console.error('Response data:', error.response.data);
-            }
             return Promise.reject(error);
         }
     }
@@ -244,7 +300,8 @@ class ApiService {
 
         try {
             const request: UpdateObjectsRequest = {
-                objects: objects
+                objects: objects,
+                sessionId: this.sessionId
             };
 
             return await api.post('/update-objects', request);
@@ -265,7 +322,8 @@ class ApiService {
     async downloadResults(): Promise<AxiosResponse<Blob>> {
         try {
             return await api.get('/download-results', {
-                responseType: 'blob'
+                responseType: 'blob',
+                params: this.sessionId ? {sessionId: this.sessionId} : undefined
             });
         } catch (error) {
             console.error('Download failed:', error);
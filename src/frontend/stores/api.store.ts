@@ -115,11 +115,13 @@ export const useApiStore = defineStore('api', () => {
                 }
             });
 
-            // Prepare inference request
+            // Prepare inference request; ask for the full mask when we have no
+            // previous segmentation to apply a diff against
             const request: InferenceRequest = {
                 clickData: clickData,
                 cubeSize: uiStore.cubeSize,
-                objectNames: uiStore.objects.map(obj => obj.name)
+                objectNames: uiStore.objects.map(obj => obj.name),
+                fullMask: !pointCloudStore.segmentedPointCloud
             };
 
             console.log('Running inference with:', {
@@ -139,8 +141,31 @@ export const useApiStore = defineStore('api', () => {
             // Update message
             processingMessage.value = 'Applying segmentation to point cloud';
 
+            // Reconstruct the full mask when the server sent only a diff
+            const payload = response.data.segmentedPointCloud;
+            let segmentation: number[];
+            if (payload.segmentationB64) {
+                // Full mask packed as one byte per point
+                const bytes = Uint8Array.from(atob(payload.segmentationB64), c => c.charCodeAt(0));
+                segmentation = Array.from(bytes);
+            } else if (payload.segmentation) {
+                segmentation = payload.segmentation;
+            } else if (payload.diffIndices !== undefined && payload.diffValues !== undefined
+                && pointCloudStore.segmentedPointCloud) {
+                const idxBytes = Uint8Array.from(atob(payload.diffIndices), c => c.charCodeAt(0));
+                const indices = new Uint32Array(idxBytes.buffer, 0, idxBytes.byteLength / 4);
+                const values = Uint8Array.from(atob(payload.diffValues), c => c.charCodeAt(0));
+                segmentation = pointCloudStore.segmentedPointCloud.segmentation.slice();
+                for (let i = 0; i < indices.length; i++) {
+                    segmentation[indices[i]] = values[i];
+                }
+            } else {
+                console.error('Invalid segmentation payload:', payload);
+                throw new Error('Invalid response from server');
+            }
+
             // Apply segmentation asynchronously and wait for it to complete
-            await pointCloudStore.applySegmentation(response.data.segmentedPointCloud);
+            await pointCloudStore.applySegmentation({segmentation});
 
             // Track progress from the point cloud store
             const unwatch = pointCloudStore.$subscribe((mutation, state) => {
@@ -179,7 +204,11 @@ export const useApiStore = defineStore('api', () => {
 
         try {
             const response = await apiService.runMaskObjectRecognition(
-                pointCloudStore.segmentedPointCloud.segmentation
+                pointCloudStore.segmentedPointCloud.segmentation,
+                (item) => {
+                    // Surface each object's result as soon as it streams in
+                    analysisResults.value = [...analysisResults.value, item];
+                }
             );
 
             if (response.data?.result && response.data.result.length > 0) {
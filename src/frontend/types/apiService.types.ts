@@ -1,4 +1,4 @@
-import {SegmentedPointCloud} from '@/types/pointCloud.types';
+import {SegmentedPointCloudPayload} from '@/types/pointCloud.types';
 import {ApiClickData} from '@/types/annotation.types';
 
 // Export updated MaskObjectRecognitionResult interface with optional obj_id field
@@ -15,15 +15,20 @@ export interface InferenceRequest {
     clickData: ApiClickData;
     cubeSize: number;
     objectNames: string[];
+    fullMask?: boolean;
+    sessionId?: string | null;
 }
 
 export interface InferenceResponse {
     message: string;
-    segmentedPointCloud: SegmentedPointCloud;
+    segmentedPointCloud: SegmentedPointCloudPayload;
 }
 
 export interface MaskObjectRecognitionRequest {
-    mask: number[];
+    mask?: number[];
+    mask_b64?: string;
+    dtype?: string;
+    sessionId?: string | null;
 }
 
 export interface MaskObjectRecognitionResult {
@@ -52,6 +57,7 @@ export interface UpdateObjectsRequest {
         name: string;
         description?: string;
     }>;
+    sessionId?: string | null;
 }
 
 export interface UpdateObjectsResponse {
@@ -15,6 +15,16 @@ export interface SegmentedPointCloud {
     segmentation: number[];
 }
 
+// Compact /api/infer payload: the full mask (base64 uint8 buffer) or a diff
+// against the previously received one (base64 uint32 indices + uint8 values)
+export interface SegmentedPointCloudPayload {
+    segmentation?: number[];
+    segmentationB64?: string;
+    diffIndices?: string;
+    diffValues?: string;
+    length?: number;
+}
+
 export interface PointCloudLoadOptions {
     useDefaultColors?: boolean;
     defaultColor?: THREE.Color;